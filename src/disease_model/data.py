@@ -44,6 +44,22 @@ class HealthData:  # pylint: disable=too-few-public-methods
     def __len__(self):
         return len(self.confirmed_cases)
 
+    def to_array(self,
+                 components: Sequence[str] = ('confirmed_cases',
+                                              'recovered',
+                                              'deaths')) -> np.ndarray:
+        """Stack the given components into a float array.
+
+        Args:
+            components: Names of the components to include, in order.
+
+        Returns:
+            Array of shape (len(components), len(self)).
+        """
+        return np.array(
+            [np.asarray(getattr(self, component), dtype=np.float64)
+             for component in components])
+
     def __getitem__(self, key):
         return HealthData(
             # Required
@@ -1,23 +1,116 @@
 """This is the external API, that other teams can call."""
+from concurrent import futures
+import copy
+import time
+from typing import Callable
+from typing import List
 from typing import Optional
 from typing import Sequence
 
+import attr
 from help_project.src.disease_model import base_model
 from help_project.src.disease_model import data
+from help_project.src.disease_model import fit_scheduler
 from help_project.src.disease_model.models import seir
 from help_project.src.disease_model.models import sir
 from help_project.src.exitstrategies import lockdown_policy
 
+EXECUTORS = {
+    'thread': futures.ThreadPoolExecutor,
+    'process': futures.ProcessPoolExecutor,
+}
+
+
+@attr.s
+class MemberStatus:  # pylint: disable=too-few-public-methods
+    """Struct for holding the outcome of the last run of an ensemble member."""
+    fit_time: Optional[float] = attr.ib(default=None)
+    fit_error: Optional[BaseException] = attr.ib(default=None)
+    predict_time: Optional[float] = attr.ib(default=None)
+    predict_error: Optional[BaseException] = attr.ib(default=None)
+
+
+def fit_member(model: base_model.BaseDiseaseModel, *args):
+    """Fit a member, returning it along with the result and time taken.
+
+    The model is returned since, when run on another process, the fitted
+    instance is a copy of the original one.
+    """
+    start = time.perf_counter()
+    result = model.fit(*args)
+    return model, result, time.perf_counter() - start
+
+
+def fit_member_copy(model: base_model.BaseDiseaseModel, *args):
+    """Fit a copy of a member, leaving the original one untouched.
+
+    Members running on threads are fitted on copies, so that a member that
+    timed out can't keep modifying the ensemble after it has moved on.
+    """
+    return fit_member(copy.deepcopy(model), *args)
+
+
+def fit_member_alone(model: base_model.BaseDiseaseModel, *args):
+    """Fit a member on a worker process, without starting nested pools.
+
+    The ensemble pool already runs the members in parallel, so compartment
+    models fit their policy slices within the worker, with a single
+    optimizer worker.
+    """
+    if not hasattr(model, 'fit_scheduler'):
+        return fit_member(model, *args)
+    scheduler = model.fit_scheduler
+    model.fit_scheduler = fit_scheduler.FitScheduler(workers=1)
+    try:
+        return fit_member(model, *args)
+    finally:
+        model.fit_scheduler = scheduler
+
+
+FIT_FUNCTIONS = {
+    None: fit_member,
+    'thread': fit_member_copy,
+    'process': fit_member_alone,
+}
+
+
+def predict_member(model: base_model.BaseDiseaseModel, *args):
+    """Get predictions for a member, along with the time taken."""
+    start = time.perf_counter()
+    result = model.predict(*args)
+    return None, result, time.perf_counter() - start
+
 
 class EnsembleModel(base_model.BaseDiseaseModel):
     """Class for Ensemble model."""
 
     def __init__(
             self,
-            models: Optional[Sequence[base_model.BaseDiseaseModel]] = None):
+            models: Optional[Sequence[base_model.BaseDiseaseModel]] = None,
+            executor: Optional[str] = None,
+            workers: Optional[int] = None,
+            timeout: Optional[float] = None):
+        """Initialize the ensemble.
+
+        Args:
+            models: The member models. Defaults to an SIR and an SEIR model.
+            executor: How to run the members: None runs them one after the
+                other, 'thread' or 'process' runs them concurrently on a
+                pool of that kind.
+            workers: Size of the pool. Defaults to one worker per member.
+            timeout: Seconds to wait for concurrent members before giving up
+                on the ones that have not finished. A member that timed out
+                while fitting is dropped from the predictions.
+        """
+        if executor is not None and executor not in EXECUTORS:
+            raise ValueError('Unknown executor: %s' % executor)
         if not models:
             models = [sir.SIR(), seir.SEIR()]
         self.models = list(models)
+        self.executor = executor
+        self.workers = workers
+        self.timeout = timeout
+        self.member_status = [MemberStatus() for _ in self.models]
 
     def fit(self,
             population_data: data.PopulationData,
@@ -25,6 +118,10 @@ class EnsembleModel(base_model.BaseDiseaseModel):
             policy_data: lockdown_policy.LockdownTimeSeries) -> bool:
         """Fit the model to the given data.
 
+        With an executor, a member failing to fit does not stop the others,
+        the error is kept in its status and it is left out of the
+        predictions. Without one, the error is raised.
+
         Args:
             population_data: Relevant data for the population of interest.
             health_data: Time-series of confirmed infections and deaths.
@@ -33,8 +130,19 @@ class EnsembleModel(base_model.BaseDiseaseModel):
         Returns:
             Whether the optimization was succesful for all models.
         """
-        return all([model.fit(population_data, health_data, policy_data)
-                    for model in self.models])
+        outcomes = self._run_members(
+            FIT_FUNCTIONS[self.executor], self.models,
+            population_data, health_data, policy_data)
+
+        success = True
+        for i, (model, result, elapsed, error) in enumerate(outcomes):
+            status = self.member_status[i]
+            status.fit_time = elapsed
+            status.fit_error = error
+            if model is not None:
+                self.models[i] = model
+            success = success and error is None and bool(result)
+        return success
 
     def predict(self,
                 population_data: data.PopulationData,
@@ -42,6 +150,9 @@ class EnsembleModel(base_model.BaseDiseaseModel):
                 future_policy_data: lockdown_policy.LockdownTimeSeries) -> data.HealthData:
         """Get predictions.
 
+        Members that failed to fit or to predict are left out of the average.
+        Without an executor, a member failing to predict raises the error.
+
         Args:
             population_data: Relevant data for the population of interest.
             past_health_data: Time-series of confirmed infections and deaths.
@@ -51,9 +162,62 @@ class EnsembleModel(base_model.BaseDiseaseModel):
             Averaged predictions of time-series of health data matching the
             length of the given policy.
         """
-        predictions = [
-            model.predict(
-                population_data, past_health_data, future_policy_data)
-            for model in self.models
-        ]
+        members = [i for i, status in enumerate(self.member_status)
+                   if status.fit_error is None]
+        outcomes = self._run_members(
+            predict_member, [self.models[i] for i in members],
+            population_data, past_health_data, future_policy_data)
+
+        predictions = []
+        errors = []
+        for i, (_, result, elapsed, error) in zip(members, outcomes):
+            status = self.member_status[i]
+            status.predict_time = elapsed
+            status.predict_error = error
+            if error is None:
+                predictions.append(result)
+            else:
+                errors.append(error)
+
+        if not predictions:
+            raise RuntimeError(
+                'No ensemble member produced predictions') from (
+                    errors[-1] if errors else None)
         return data.HealthData.average(predictions)
+
+    def _run_members(self,
+                     function: Callable,
+                     models: Sequence[base_model.BaseDiseaseModel],
+                     *args) -> List:
+        """Run the function for each model.
+
+        With an executor, the failures of the members are isolated from each
+        other. Without one, the members run one after the other and their
+        errors are raised.
+
+        Returns:
+            One (model, result, elapsed, error) tuple per model, in order.
+            The first three are None when the member raised an error.
+        """
+        if self.executor is None:
+            return [function(model, *args) + (None,) for model in models]
+
+        pool = EXECUTORS[self.executor](
+            max_workers=self.workers or max(len(models), 1))
+        try:
+            pending = [pool.submit(function, model, *args) for model in models]
+            futures.wait(pending, timeout=self.timeout)
+            outcomes = []
+            for future in pending:
+                if not future.done():
+                    future.cancel()
+                    outcomes.append((None, None, None, futures.TimeoutError(
+                        'Member did not finish in %ss' % self.timeout)))
+                elif future.exception() is not None:
+                    outcomes.append((None, None, None, future.exception()))
+                else:
+                    outcomes.append(future.result() + (None,))
+            return outcomes
+        finally:
+            # Do not wait for members that timed out
+            pool.shutdown(wait=False)
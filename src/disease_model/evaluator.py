@@ -0,0 +1,127 @@
+"""Module for evaluating policies with a fitted disease model."""
+import datetime
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from help_project.src.disease_model import base_model
+from help_project.src.disease_model import data
+from help_project.src.disease_model.models import compartment_model
+from help_project.src.exitstrategies import lockdown_policy
+
+
+class HealthEvaluator():
+    """Evaluates the health outcome of policies for a fixed scenario.
+
+    The fitted model, population and past health data are bound once, so that
+    the optimizer only has to hand over the policy to evaluate.
+    """
+
+    def __init__(self,
+                 model: base_model.BaseDiseaseModel,
+                 population_data: data.PopulationData,
+                 past_health_data: data.HealthData,
+                 forecast_length: int,
+                 start: Optional[datetime.date] = None):
+        """Initialize the evaluator.
+
+        Args:
+            model: A fitted disease model or ensemble.
+            population_data: Relevant data for the population of interest.
+            past_health_data: Time-series of confirmed infections and deaths.
+            forecast_length: Number of days to predict for a single policy.
+            start: First predicted day. Defaults to the day after the last one
+                in the past health data, or today if it has no dates.
+        """
+        self.model = model
+        self.population_data = population_data
+        self.forecast_length = forecast_length
+        if start is None:
+            start = self.next_day(past_health_data)
+        self.start = start
+        self.end = start + datetime.timedelta(days=forecast_length)
+        # Dated like the model's predictions for a time series
+        self.index = self.policy_timeseries(
+            lockdown_policy.LockdownPolicy()).dates()
+
+        # Compartment models only start from the last day, and taking it out
+        # of the series once saves going through pandas on every run.
+        if isinstance(model, compartment_model.CompartmentModel):
+            self.past_health_data = self.last_day(past_health_data)
+        else:
+            self.past_health_data = past_health_data
+
+    @classmethod
+    def next_day(cls, health_data: data.HealthData) -> datetime.date:
+        """Get the day after the last one in the health data."""
+        index = getattr(health_data.confirmed_cases, 'index', None)
+        if isinstance(index, pd.DatetimeIndex) and len(index):
+            return index[-1].date() + datetime.timedelta(days=1)
+        return datetime.date.today()
+
+    @classmethod
+    def last_day(cls, health_data: data.HealthData) -> data.HealthData:
+        """Get the last day of the health data as plain lists of floats."""
+        def last_value(component):
+            values = getattr(health_data, component)
+            if values is None:
+                return None
+            return [float(np.asarray(values, dtype=np.float64)[-1])]
+
+        return data.HealthData(
+            confirmed_cases=last_value('confirmed_cases'),
+            recovered=last_value('recovered'),
+            deaths=last_value('deaths'),
+            exposed_cases=last_value('exposed_cases'),
+            unreported_cases=last_value('unreported_cases'),
+        )
+
+    def policy_timeseries(
+            self, policy: lockdown_policy.LockdownPolicy
+    ) -> lockdown_policy.LockdownTimeSeries:
+        """Get the time series applying the policy over the forecast."""
+        return lockdown_policy.LockdownTimeSeries(
+            policies=[
+                lockdown_policy.LockdownPolicyApplication(
+                    policy=policy, start=self.start, end=self.end),
+            ])
+
+    def run(self,
+            policy: Union[lockdown_policy.LockdownPolicy,
+                          lockdown_policy.LockdownTimeSeries,
+                          Dict]) -> data.HealthData:
+        """Predict the health outcome of a policy.
+
+        Args:
+            policy: Either a policy applied over the whole forecast, the
+                keyword arguments for one, or a time series of policies.
+
+        Returns:
+            Predicted time-series of health data.
+        """
+        if isinstance(policy, lockdown_policy.LockdownTimeSeries):
+            return self.model.predict(
+                self.population_data, self.past_health_data, policy)
+        if isinstance(policy, dict):
+            policy = lockdown_policy.LockdownPolicy(**policy)
+
+        if not isinstance(self.model, compartment_model.CompartmentModel):
+            return self.model.predict(
+                self.population_data, self.past_health_data,
+                self.policy_timeseries(policy))
+
+        output = self.model.predict_with_params(
+            self.population_data,
+            self.past_health_data,
+            forecast_length=self.forecast_length,
+            params=self.model.get_many_policy_params([policy])[0],
+            policy=policy,
+        )
+        output.index = self.index
+        return output
+
+    def __call__(self, *args, **kwargs):
+        """Shortcut to call the run function."""
+        return self.run(*args, **kwargs)
@@ -0,0 +1,95 @@
+"""Module for scheduling model fits on a shared process pool."""
+from concurrent import futures
+import os
+from typing import Dict
+from typing import Optional
+
+from help_project.src.disease_model import data
+
+
+def fit_single_policy(model,
+                      population_data: data.PopulationData,
+                      health_data: data.HealthData) -> Optional[Dict]:
+    """Fit a model to a single policy slice within the current process.
+
+    Args:
+        model: The compartment model to fit.
+        population_data: Relevant data for the population of interest.
+        health_data: Time-series of confirmed infections and deaths.
+
+    Returns:
+        The computed params as a dict if the optimization was successful.
+    """
+    # The scheduler already provides the parallelism, so the optimizer must
+    # not start a pool of its own inside each task.
+    return model.compute_fit_for_single_policy(
+        population_data, health_data, workers=1)
+
+
+class FitScheduler():
+    """Scheduler running fits of (model, policy slice) pairs as tasks.
+
+    A single process pool is created on first use and reused by every fit
+    going through the scheduler until it is shut down. The same scheduler can
+    be shared by several models (e.g. the members of an ensemble) so that
+    their slices are spread over one pool instead of each slice spinning up
+    its own.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """Initialize the scheduler.
+
+        Args:
+            workers: Number of worker processes. Defaults to the number of
+                CPUs. With a single worker, fits run in the calling process.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    def submit(self,
+               model,
+               population_data: data.PopulationData,
+               health_data: data.HealthData) -> futures.Future:
+        """Schedule the fit of a model to a single policy slice.
+
+        Args:
+            model: The compartment model to fit.
+            population_data: Relevant data for the population of interest.
+            health_data: Time-series of confirmed infections and deaths.
+
+        Returns:
+            A future resolving to the computed params, or None if the
+            optimization was not successful.
+        """
+        if self.workers == 1:
+            future = futures.Future()
+            try:
+                future.set_result(
+                    fit_single_policy(model, population_data, health_data))
+            except Exception as error:  # pylint: disable=broad-except
+                future.set_exception(error)
+            return future
+
+        if self._executor is None:
+            self._executor = futures.ProcessPoolExecutor(
+                max_workers=self.workers)
+        return self._executor.submit(
+            fit_single_policy, model, population_data, health_data)
+
+    def shutdown(self):
+        """Shut down the process pool, if it was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
+
+    def __getstate__(self):
+        # Models holding a scheduler get sent to the workers, the pool can't.
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
@@ -0,0 +1,135 @@
+"""Module with the integrators used to solve compartment models."""
+from typing import Callable
+
+import numpy as np
+from scipy import integrate
+
+
+class Integrator():  # pylint: disable=too-few-public-methods
+    """Base integrator for the equations of a compartment model.
+
+    The equations are a callable taking the time and the state and returning
+    the derivative of the state. The state is an array whose first axis
+    indexes the compartments, and may carry extra axes for stacked
+    trajectories.
+    """
+
+    def integrate(self,
+                  equations: Callable,
+                  initial_state: np.ndarray,
+                  forecast_length: int) -> np.ndarray:
+        """Integrate the equations from the initial state.
+
+        Args:
+            equations: Function mapping (time, state) to the derivatives.
+            initial_state: Array with the starting value of the state.
+            forecast_length: Number of days to integrate for.
+
+        Returns:
+            Array of shape initial_state.shape + (forecast_length,) with the
+            state at the end of each day. If the solve stops early, the days
+            after it are NaN.
+        """
+        raise NotImplementedError()
+
+
+class ScipyIntegrator(Integrator):  # pylint: disable=too-few-public-methods
+    """Adaptive integrator based on scipy's solve_ivp."""
+
+    def __init__(self, method: str = 'RK45', **solver_kwargs):
+        """Initialize the integrator.
+
+        Args:
+            method: The solve_ivp method to use.
+            **solver_kwargs: Extra options for solve_ivp (e.g. rtol, atol).
+        """
+        self.method = method
+        self.solver_kwargs = solver_kwargs
+
+    def integrate(self,
+                  equations: Callable,
+                  initial_state: np.ndarray,
+                  forecast_length: int) -> np.ndarray:
+        """Integrate the equations from the initial state."""
+        initial_state = np.asarray(initial_state, dtype=np.float64)
+        shape = initial_state.shape
+
+        def flat_equations(t, state):
+            return equations(t, state.reshape(shape)).reshape(-1)
+
+        prediction = integrate.solve_ivp(
+            flat_equations,
+            t_span=(0, forecast_length),
+            t_eval=np.arange(1, forecast_length + 1),
+            y0=initial_state.reshape(-1),
+            method=self.method,
+            **self.solver_kwargs)
+
+        # The solver returns only the days reached when it stops early (e.g.
+        # on a blow up), so pad the rest with NaN for the losses to skip
+        output = np.full((initial_state.size, forecast_length), np.nan)
+        solved = np.reshape(prediction.y, (initial_state.size, -1))
+        output[:, :solved.shape[1]] = solved
+        return output.reshape(shape + (forecast_length,))
+
+
+class RK4Integrator(Integrator):  # pylint: disable=too-few-public-methods
+    """Classic fixed-step Runge-Kutta integrator.
+
+    Cheaper than the adaptive solver since there is no error control and the
+    state lands exactly on each day, at the cost of some accuracy. Stiff
+    parameters (e.g. very high infection rates) need more steps per day to
+    remain stable.
+    """
+
+    def __init__(self, steps_per_day: int = 1):
+        """Initialize the integrator.
+
+        Args:
+            steps_per_day: Number of RK4 steps taken to advance one day.
+        """
+        if steps_per_day < 1:
+            raise ValueError('steps_per_day must be at least 1')
+        self.steps_per_day = steps_per_day
+
+    def integrate(self,
+                  equations: Callable,
+                  initial_state: np.ndarray,
+                  forecast_length: int) -> np.ndarray:
+        """Integrate the equations from the initial state."""
+        state = np.array(initial_state, dtype=np.float64)
+        output = np.empty(state.shape + (forecast_length,))
+        step = 1 / self.steps_per_day
+        half_step = step / 2
+        time = 0.0
+        for day in range(forecast_length):
+            for _ in range(self.steps_per_day):
+                k_1 = equations(time, state)
+                k_2 = equations(time + half_step, state + half_step * k_1)
+                k_3 = equations(time + half_step, state + half_step * k_2)
+                k_4 = equations(time + step, state + step * k_3)
+                state = state + step / 6 * (k_1 + 2 * (k_2 + k_3) + k_4)
+                time += step
+            output[..., day] = state
+        return output
+
+
+class DifferenceIntegrator(Integrator):  # pylint: disable=too-few-public-methods
+    """Discrete-time integrator that treats the equations as daily changes.
+
+    Each day the state is advanced by the derivatives evaluated at the start
+    of the day (forward Euler with a one day step). This is the cheapest
+    option but is only accurate when daily rates are small.
+    """
+
+    def integrate(self,
+                  equations: Callable,
+                  initial_state: np.ndarray,
+                  forecast_length: int) -> np.ndarray:
+        """Integrate the equations from the initial state."""
+        state = np.array(initial_state, dtype=np.float64)
+        output = np.empty(state.shape + (forecast_length,))
+        for day in range(forecast_length):
+            state = state + equations(float(day), state)
+            output[..., day] = state
+        return output
@@ -1,21 +1,46 @@
 """Simple SIR model."""
 import copy
 from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
 from typing import Union
 
 import numpy as np
-import pandas as pd
-from scipy import integrate
 from scipy import optimize
 from help_project.src.disease_model import base_model
 from help_project.src.disease_model import data
+from help_project.src.disease_model import integrator as integrator_lib
 from help_project.src.disease_model import parameter
+from help_project.src.disease_model import prediction_cache
 from help_project.src.exitstrategies import lockdown_policy
 
 
+def prepare_residue_data(
+        health_data: data.HealthData) -> Tuple[data.HealthData, np.ndarray]:
+    """Split health data into the starting point and observed values.
+
+    Args:
+        health_data: Time-series of confirmed infections and deaths.
+
+    Returns:
+        A tuple with the health data for the first day, holding plain
+        floats, and an array of shape (3, len(health_data) - 1) with the
+        confirmed cases, recovered and deaths for the remaining days.
+    """
+    values = health_data.to_array()
+    exposed_cases = (
+        None if health_data.exposed_cases is None
+        else [float(np.asarray(health_data.exposed_cases)[0])])
+    starting_health_data = data.HealthData(
+        confirmed_cases=[values[0, 0]],
+        recovered=[values[1, 0]],
+        deaths=[values[2, 0]],
+        exposed_cases=exposed_cases)
+    return starting_health_data, np.ascontiguousarray(values[:, 1:])
+
+
 class CompartmentModel(base_model.BaseDiseaseModel):
     """Base compartment model.
 
@@ -23,27 +48,98 @@ class CompartmentModel(base_model.BaseDiseaseModel):
     differential equations define the change of these over time.
     """
 
-    def __init__(self, parameter_config: parameter.ParameterConfig):
+    # Names of the params used by the equations, in the order they expect them
+    EQUATION_PARAMS: Tuple[str, ...] = ()
+    # Compartments matching the confirmed cases, recovered and deaths
+    OBSERVED_COMPARTMENTS: Tuple[int, ...] = ()
+
+    def __init__(self,
+                 parameter_config: parameter.ParameterConfig,
+                 integrator_backend: Optional[integrator_lib.Integrator] = None):
         self.params = {}
         self.parameter_config = parameter_config
+        self.prediction_cache = prediction_cache.PredictionCache()
+        self._integrator = (
+            integrator_backend or integrator_lib.ScipyIntegrator())
+        # Optional scheduler to fit the policy slices in parallel
+        self.fit_scheduler = None
         self.parameter_mapper = {}
+        self.equation_param_indices = (
+            list(parameter_config.index(*self.EQUATION_PARAMS))
+            if parameter_config else [])
+
+    @property
+    def integrator(self) -> integrator_lib.Integrator:
+        """The integrator used to solve the equations of the model."""
+        return self._integrator
+
+    @integrator.setter
+    def integrator(self, integrator_backend: integrator_lib.Integrator):
+        # Cached predictions depend on the integrator
+        self.prediction_cache.clear()
+        self._integrator = integrator_backend
 
     def differential_equations(
-            self, _,
+            self, t,
             compartments: Tuple[float, ...],
             *args: Tuple[float, ...]):
         """Differential equations for this model.
 
+        Kept for callers using the flat argument form. Delegates to the
+        vectorized equations, which is what the solvers use internally.
+
         Args:
-            _: Timestep, which is not used.
+            t: Timestep, which is not used.
             compartments: Tuple of population in each compartment.
             *args: Parameters used for the equations as a Tuple.
 
         Returns:
             Derivatives for each compartment.
         """
+        return tuple(self.vectorized_equations(
+            t, np.asarray(compartments, dtype=np.float64),
+            self.resolve_equation_params(args)))
+
+    def vectorized_equations(
+            self, _,
+            compartments: np.ndarray,
+            params: Tuple) -> np.ndarray:
+        """Differential equations for this model over numpy arrays.
+
+        The first axis of compartments indexes the compartment. Any trailing
+        axes are broadcast against the resolved params, so a single call can
+        evaluate many states and parameter sets at once.
+
+        Args:
+            _: Timestep, which is not used.
+            compartments: Array with the population in each compartment.
+            params: Params as returned by `resolve_equation_params`.
+
+        Returns:
+            Array with the derivatives for each compartment.
+        """
         raise NotImplementedError()
 
+    def resolve_equation_params(self, values: Sequence) -> Tuple:
+        """Pick the params used by the equations out of a param vector.
+
+        This is done once per integration rather than on every evaluation of
+        the equations.
+
+        Args:
+            values: Param values in config order, either a vector or an array
+                of shape (n_params, ...) holding several param sets.
+
+        Returns:
+            Tuple with one entry per name in EQUATION_PARAMS. Entries are
+            floats for a single param set and arrays for several.
+        """
+        resolved = np.asarray(values, dtype=np.float64)[
+            self.equation_param_indices]
+        if resolved.ndim == 1:
+            return tuple(resolved.tolist())
+        return tuple(resolved)
+
     def compute_initial_state(
             self,
             population_data: data.PopulationData,
@@ -87,22 +183,40 @@ class CompartmentModel(base_model.BaseDiseaseModel):
         Returns:
             Mean Square Error for the time series of the health data.
         """
-        starting_health_data = health_data[[0]]
-        parsed_params = self.parameter_config.parse(params)
-        predictions = self.predict_with_params(
+        starting_health_data, observed = prepare_residue_data(
+            health_data)
+        return self.array_residue(
+            params, population_data, starting_health_data, observed)
+
+    def array_residue(self,
+                      params: Sequence[float],
+                      population_data: data.PopulationData,
+                      starting_health_data: data.HealthData,
+                      observed: np.ndarray) -> float:
+        """Residue for a solution to the model over preprocessed data.
+
+        This is what the fit loop evaluates, so it works on arrays only.
+
+        Args:
+            params: The chosen params to try.
+            population_data: Relevant data for the population of interest.
+            starting_health_data: Health data for the first day, as returned
+                by `prepare_residue_data`.
+            observed: Array with the confirmed cases, recovered and deaths
+                for the following days, as returned by `prepare_residue_data`.
+
+        Returns:
+            Sum of the Mean Square Error of each observed time series.
+        """
+        initial_state = self.compute_initial_state(
             population_data,
             starting_health_data,
-            forecast_length=len(health_data) - 1,
-            params=parsed_params,
-        )
-
-        expected_health_data = health_data[1:]
-        deltas = [
-            predictions.confirmed_cases - expected_health_data.confirmed_cases,
-            predictions.recovered - expected_health_data.recovered,
-            predictions.deaths - expected_health_data.deaths,
-        ]
-        return sum([np.square(d).mean() for d in deltas])
+            self.parameter_config.parse(params))
+        predictions = self.integrate(
+            initial_state, observed.shape[1], params)
+        errors = np.square(
+            predictions[list(self.OBSERVED_COMPARTMENTS)] - observed)
+        return np.nanmean(errors, axis=1).sum()
 
     def fit(self,
             population_data: data.PopulationData,
@@ -114,6 +228,10 @@ class CompartmentModel(base_model.BaseDiseaseModel):
         Then does the fit process separately for each of these slices and
         aggregates the resulting params.
 
+        If a fit scheduler is set, the slices are fit as parallel tasks on its
+        shared pool. Otherwise they are fit one after the other, each using a
+        pool of its own for the optimizer.
+
         Args:
             population_data: Relevant data for the population of interest.
             health_data: Time-series of confirmed infections and deaths.
@@ -122,36 +240,59 @@ class CompartmentModel(base_model.BaseDiseaseModel):
         Returns:
             Whether the optimization was successful in finding a solution.
         """
+        self.prediction_cache.clear()
+        health_data_subsets = [
+            health_data[policy_application.start:policy_application.end]
+            for policy_application in policy_data.policies
+        ]
+        if self.fit_scheduler is None:
+            all_computed_params = [
+                self.compute_fit_for_single_policy(
+                    population_data, health_data_subset)
+                for health_data_subset in health_data_subsets
+            ]
+        else:
+            scheduled_fits = [
+                self.fit_scheduler.submit(
+                    self, population_data, health_data_subset)
+                for health_data_subset in health_data_subsets
+            ]
+            all_computed_params = [fit.result() for fit in scheduled_fits]
+
         policies = []
         params = []
-        for policy_application in policy_data.policies:
-            health_data_subset = health_data[policy_application.start:policy_application.end]
-            computed_params = self.compute_fit_for_single_policy(
-                population_data, health_data_subset)
+        for policy_application, computed_params in zip(
+                policy_data.policies, all_computed_params):
             if computed_params:
                 policies.append(policy_application)
                 params.append(computed_params)
 
         self.aggregate_and_save_params(policies, params)
+        return len(params) == len(policy_data.policies)
 
     def compute_fit_for_single_policy(
             self,
             population_data: data.PopulationData,
-            health_data: data.HealthData) -> Optional[Dict]:
+            health_data: data.HealthData,
+            workers: int = -1) -> Optional[Dict]:
         """Fit the model to the given data.
 
         Args:
             population_data: Relevant data for the population of interest.
             health_data: Time-series of confirmed infections and deaths.
+            workers: Number of processes used by the optimizer, as in
+                scipy's differential_evolution (-1 uses all CPUs).
 
         Returns:
             The computed params as a dict if the optimization was successful.
         """
+        starting_health_data, observed = prepare_residue_data(
+            health_data)
         result = optimize.differential_evolution(
-            self.residue,
+            self.array_residue,
             bounds=tuple(param.bounds for param in self.parameter_config),
-            args=(population_data, health_data),
-            workers=-1,
+            args=(population_data, starting_health_data, observed),
+            workers=workers,
             updating='deferred',
         )
 
@@ -174,44 +315,110 @@ class CompartmentModel(base_model.BaseDiseaseModel):
             Predicted time-series of health data matching the length of the
             given policy.
         """
-        current_health_data = past_health_data
-        predictions = []
-        for policy_application in future_policy_data.policies:
-            params = self.get_params()
-            mapper_params = self.parameter_mapper.get(policy_application.policy)
-            # Update params with the multiplicative factors from the mapper
-            for param, value in mapper_params.items():
-                params[param] *= value
+        return self.predict_scenarios(
+            population_data, past_health_data, [future_policy_data])[0]
 
-            next_health_data = self.predict_with_params(
-                population_data,
-                current_health_data,
-                forecast_length=len(policy_application),
-                params=params,
-            )
-            predictions.append(next_health_data)
-            current_health_data = next_health_data
+    def predict_scenarios(
+            self,
+            population_data: data.PopulationData,
+            past_health_data: data.HealthData,
+            scenarios: Sequence[lockdown_policy.LockdownTimeSeries],
+    ) -> List[data.HealthData]:
+        """Get predictions for many policy time series at once.
+
+        Time series that start with the same policy applications share the
+        prediction for those: each distinct prefix is integrated once, and
+        the following applications branch off from its end state.
+
+        Args:
+            population_data: Relevant data for the population of interest.
+            past_health_data: Time-series of confirmed infections and deaths.
+            scenarios: Time-series of lockdown policy to predict for.
+
+        Returns:
+            Predicted time-series of health data for each scenario, matching
+            the length of its policy.
+        """
+        policies = list(dict.fromkeys(
+            policy_application.policy
+            for scenario in scenarios
+            for policy_application in scenario.policies))
+        policy_params = dict(zip(policies, self.get_many_policy_params(policies)))
+        # Prediction for the last application of each prefix seen so far
+        segments = {(): past_health_data}
+        outputs = []
+        for scenario in scenarios:
+            prefix = ()
+            predictions = []
+            for policy_application in scenario.policies:
+                parent = prefix
+                prefix = prefix + (policy_application,)
+                if prefix not in segments:
+                    policy = policy_application.policy
+                    segments[prefix] = self.predict_with_params(
+                        population_data,
+                        segments[parent],
+                        forecast_length=len(policy_application),
+                        params=policy_params[policy],
+                        policy=policy,
+                    )
+                predictions.append(segments[prefix])
+
+            output = data.HealthData.concatenate(predictions)
+            output.index = scenario.dates()
+            outputs.append(output)
+        return outputs
 
-        index = pd.date_range(
-            future_policy_data.start, future_policy_data.end, closed='left')
+    def get_many_policy_params(
+            self,
+            policies: Sequence[lockdown_policy.LockdownPolicy]) -> List[Dict]:
+        """Get the params to use under each of the given policies.
+
+        Mappers supporting it are queried once for all the policies.
+
+        Args:
+            policies: The policies to get the params for.
 
-        output = data.HealthData.concatenate(predictions)
-        output.index = index
-        return output
+        Returns:
+            The model params for each policy, with the policy-dependent ones
+            scaled by the multiplicative factors from the parameter mapper.
+        """
+        if hasattr(self.parameter_mapper, 'get_many'):
+            keys = self.parameter_mapper.param_keys
+            all_mapper_params = [
+                dict(zip(keys, row))
+                for row in self.parameter_mapper.get_many(policies).tolist()]
+        else:
+            all_mapper_params = [
+                self.parameter_mapper.get(policy) for policy in policies]
+
+        all_params = []
+        for mapper_params in all_mapper_params:
+            params = self.get_params()
+            for param, value in mapper_params.items():
+                params[param] *= value
+            all_params.append(params)
+        return all_params
 
     def predict_with_params(
             self,
             population_data: data.PopulationData,
             past_health_data: data.HealthData,
             forecast_length: int,
-            params: Dict) -> data.HealthData:
+            params: Dict,
+            policy: Optional[lockdown_policy.LockdownPolicy] = None
+    ) -> data.HealthData:
         """Get predictions.
 
+        Predictions are cached by policy, params, initial state and length, so
+        repeated queries skip the integration.
+
         Args:
             population_data: Relevant data for the population of interest.
             past_health_data: Time-series of confirmed infections and deaths.
             forecast_length: Length of the forecast to produce.
             params: The parameters to use for the predictions.
+            policy: The policy the params were derived from, if any.
 
         Returns:
             Predicted time-series of health data matching the length of the
@@ -226,15 +433,86 @@ class CompartmentModel(base_model.BaseDiseaseModel):
 
         initial_state = self.compute_initial_state(
             population_data, past_health_data, params)
+        params_array = self.parameter_config.to_array(params)
+
+        cache_key = self.prediction_cache.make_key(
+            policy, params_array, initial_state, forecast_length)
+        prediction = self.prediction_cache.get(cache_key)
+        if prediction is None:
+            prediction = self.prediction_cache.put(
+                cache_key,
+                self.integrate(initial_state, forecast_length, params_array))
+
+        return self.format_output(prediction)
+
+    def predict_batch(
+            self,
+            population_data: data.PopulationData,
+            past_health_data: data.HealthData,
+            forecast_length: int,
+            params: np.ndarray) -> List[data.HealthData]:
+        """Get predictions for many parameter sets at once.
+
+        All the trajectories are stacked into a single state and integrated
+        together, instead of doing one integration per parameter set.
+
+        Args:
+            population_data: Relevant data for the population of interest.
+            past_health_data: Time-series of confirmed infections and deaths.
+            forecast_length: Length of the forecast to produce.
+            params: Array of shape (n_sets, n_params) with one parameter set
+                per row, in parameter config order.
+
+        Returns:
+            Predicted time-series of health data for each parameter set.
+        """
+        params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+        if params.shape[1] != len(self.parameter_config):
+            raise ValueError(
+                'Expected %d params per set, got %d' % (
+                    len(self.parameter_config), params.shape[1]))
+        n_sets = params.shape[0]
+
+        # Parsing the transposed matrix maps each param to a column of values
+        initial_state = self.compute_initial_state(
+            population_data, past_health_data,
+            self.parameter_config.parse(params.T))
+        initial_state = np.array(
+            [np.broadcast_to(compartment, (n_sets,))
+             for compartment in initial_state],
+            dtype=np.float64)
+
+        predictions = self.integrate(initial_state, forecast_length, params.T)
+        return [self.format_output(predictions[:, k]) for k in range(n_sets)]
+
+    def integrate(self,
+                  initial_state: Sequence,
+                  forecast_length: int,
+                  params: np.ndarray) -> np.ndarray:
+        """Integrate the equations of the model from the given state.
+
+        The integration itself is delegated to the model's integrator.
+
+        Args:
+            initial_state: Population in each compartment, either a vector or
+                an array of shape (n_compartments, n_sets).
+            forecast_length: Number of days to integrate for.
+            params: Param vector in config order, or an array of shape
+                (n_params, n_sets) when integrating several sets.
+
+        Returns:
+            Array of shape (n_compartments, [n_sets,] forecast_length) with
+            the compartments at the end of each day.
+        """
+        equation_params = self.resolve_equation_params(params)
 
-        prediction = integrate.solve_ivp(
-            self.differential_equations,
-            t_span=(0, forecast_length),
-            t_eval=np.arange(1, forecast_length + 1),
-            y0=initial_state,
-            args=self.parameter_config.flatten(params))
+        def equations(t, compartments):
+            return self.vectorized_equations(t, compartments, equation_params)
 
-        return self.format_output(prediction.y)
+        return self.integrator.integrate(
+            equations,
+            np.asarray(initial_state, dtype=np.float64),
+            forecast_length)
 
     def aggregate_params(self, computed_params, weights):
         """Aggregate the given parameters using the given weights.
@@ -297,6 +575,7 @@ class CompartmentModel(base_model.BaseDiseaseModel):
         if not isinstance(values, dict):
             values = self.parameter_config.parse(values)
         self.params = copy.deepcopy(values)
+        self.prediction_cache.clear()
 
     def get_params(self) -> Dict:
         """Getter for params."""
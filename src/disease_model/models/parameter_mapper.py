@@ -1,7 +1,16 @@
 """Module containing a learnable parameter mapper for compartment models."""
-import attr
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+
 import numpy as np
+import sklearn
 from sklearn import neighbors
+from help_project.src.exitstrategies import lockdown_policy
 
 
 class ParameterMapper():
@@ -10,11 +19,28 @@ class ParameterMapper():
     The mapper uses KNN internally to map policies to parameter values.
     """
 
-    def __init__(self, n_neighbors: int = 3, weights: str = 'distance'):
+    def __init__(self,
+                 n_neighbors: int = 3,
+                 weights: str = 'distance',
+                 algorithm: str = 'auto',
+                 cache_dir: Optional[str] = None):
+        """Initialize the mapper.
+
+        Args:
+            n_neighbors: Number of neighbors to interpolate between.
+            weights: How to weight the neighbors, 'distance' or 'uniform'.
+            algorithm: Neighbor search structure: 'brute', 'kd_tree',
+                'ball_tree' or 'auto' to let sklearn pick one.
+            cache_dir: Directory where fitted mappers are cached, keyed by
+                their settings, training data and sklearn version. None,
+                the default, disables the cache.
+        """
         self.knn = neighbors.KNeighborsRegressor(
             n_neighbors=n_neighbors,
-            weights=weights)
+            weights=weights,
+            algorithm=algorithm)
         self.param_keys = []
+        self.cache_dir = cache_dir
 
     def fit(self, models):
         """Fit to the given models.
@@ -22,20 +48,67 @@ class ParameterMapper():
         The models must already have been fit to the data.
         """
         # pylint: disable=invalid-name
-        x = []
+        policies = []
         y = []
+        self.param_keys = list(list(models[0].parameter_mapper.values())[0])
         for model in models:
             for policy, params in model.parameter_mapper.items():
-                x.append(
-                    np.array(list(attr.asdict(policy).values())))
-                y.append(list(params.values()))
+                policies.append(policy)
+                y.append([params[key] for key in self.param_keys])
+        x = lockdown_policy.PolicyMatrix.from_policies(policies).array
+        y = np.array(y, dtype=np.float64)
+
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, self.cache_key(x, y) + '.pickle')
+            try:
+                with open(path, 'rb') as cache_file:
+                    self.knn = pickle.load(cache_file)
+                return
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass  # Missing or corrupt, fit again and overwrite it
+
         self.knn.fit(x, y)
-        self.param_keys = list(models[0].parameter_mapper.values())[0].keys()
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write under a unique temporary name so that readers never see
+            # partial files, even with several processes fitting at once
+            with tempfile.NamedTemporaryFile(
+                    dir=self.cache_dir, suffix='.tmp', delete=False) as cache_file:
+                pickle.dump(self.knn, cache_file)
+            os.replace(cache_file.name, path)
 
+    def cache_key(self, x: np.ndarray, y: np.ndarray) -> str:
+        """Get the key identifying a fit on the given data."""
+        digest = hashlib.sha256()
+        digest.update(repr((
+            # Pickled estimators are only reliable with the same sklearn
+            sklearn.__version__,
+            sorted(self.knn.get_params().items()),
+            lockdown_policy.POLICY_FIELDS,
+            self.param_keys,
+            x.shape,
+            y.shape,
+        )).encode())
+        digest.update(x.tobytes())
+        digest.update(y.tobytes())
+        return digest.hexdigest()
 
-    def get(self, policy):
+    def get_many(self, policies: Sequence[lockdown_policy.LockdownPolicy]) -> np.ndarray:
+        """Get the parameters for many policies in a single query.
+
+        Args:
+            policies: The policies, or a PolicyMatrix of them.
+
+        Returns:
+            Array of shape (len(policies), len(self.param_keys)), with the
+            params in param_keys order.
+        """
+        x = lockdown_policy.PolicyMatrix.from_policies(policies).array
+        if len(x) == 0:
+            return np.zeros((0, len(self.param_keys)))
+        return np.asarray(self.knn.predict(x)).reshape(len(x), -1)
+
+    def get(self, policy) -> Dict[str, float]:
         """Get the parameters for the policy."""
-        # pylint: disable=invalid-name
-        x = np.array(list(attr.asdict(policy).values()))
-        y = self.knn.predict([x])
-        return dict(zip(self.param_keys, y[0]))
+        return dict(zip(self.param_keys, self.get_many([policy])[0].tolist()))
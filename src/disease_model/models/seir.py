@@ -3,6 +3,7 @@ from typing import Dict
 from typing import Sequence
 from typing import Tuple
 
+import numpy as np
 from help_project.src.disease_model import data
 from help_project.src.disease_model import parameter
 from help_project.src.disease_model.models import compartment_model
@@ -54,42 +55,42 @@ class SEIR(compartment_model.CompartmentModel):
                             bounds=(0, 1)),
     )
 
-    def __init__(self, parameter_config=None):
-        super().__init__(parameter_config or SEIR.DEFAULT_PARAMETER_CONFIG)
+    EQUATION_PARAMS = ('beta', 'gamma', 'sigma', 'b', 'mu', 'mu_i', 'cfr')
+    OBSERVED_COMPARTMENTS = (2, 3, 4)
+
+    def __init__(self, parameter_config=None, integrator_backend=None):
+        super().__init__(parameter_config or SEIR.DEFAULT_PARAMETER_CONFIG,
+                         integrator_backend)
         self.parameter_mapper = {}
 
-    def differential_equations(
+    def vectorized_equations(
             self, _,
-            compartments: Tuple[float, float, float],
-            *args: Tuple[float, ...]):
-        """Differential equations for this model.
+            compartments: np.ndarray,
+            params: Tuple) -> np.ndarray:
+        """Differential equations for this model over numpy arrays.
 
         Args:
             _: Timestep, which is not used.
-            compartments: Tuple of population in each compartment (S, I, R).
-            *args: Parameters used for the equations as a Tuple.
+            compartments: Array with the population in each compartment
+                (S, E, I, R, D).
+            params: Params as returned by `resolve_equation_params`.
 
         Returns:
-            Derivatives for each compartment.
+            Array with the derivatives for each compartment.
         """
         # pylint: disable=invalid-name,too-many-locals
         s, e, i, r, _ = compartments
         population = s + e + i + r
-        parameters = self.parameter_config.parse(args)
-        beta = parameters['beta']
-        gamma = parameters['gamma']
-        sigma = parameters['sigma']
-        b = parameters['b']
-        mu = parameters['mu']
-        mu_i = parameters['mu_i']
-        cfr = parameters['cfr']
-
-        ds = -(beta * s * i / population) + (b - mu) * s
-        de = beta * s * i / population - sigma * e - mu * e
+        beta, gamma, sigma, b, mu, mu_i, cfr = params
+
+        infections = beta * s * i / population
+
+        ds = -infections + (b - mu) * s
+        de = infections - sigma * e - mu * e
         di = sigma * e - (gamma * (1 - cfr) + mu_i * cfr) * i - mu * i
         dr = gamma * (1 - cfr) * i - mu * r
         dd = mu_i * cfr * i
-        return ds, de, di, dr, dd
+        return np.array([ds, de, di, dr, dd])
 
     def compute_initial_state(
             self,
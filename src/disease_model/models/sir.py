@@ -2,6 +2,7 @@
 from typing import Sequence
 from typing import Tuple
 
+import numpy as np
 from help_project.src.disease_model import data
 from help_project.src.disease_model import parameter
 from help_project.src.disease_model.models import compartment_model
@@ -46,40 +47,39 @@ class SIR(compartment_model.CompartmentModel):
                             bounds=(0, 0.05))
     )
 
-    def __init__(self, parameter_config=None):
+    EQUATION_PARAMS = ('beta', 'gamma', 'b', 'mu', 'mu_i', 'cfr')
+    OBSERVED_COMPARTMENTS = (1, 2, 3)
+
+    def __init__(self, parameter_config=None, integrator_backend=None):
         """Initialize the SIR model."""
-        super().__init__(parameter_config or SIR.DEFAULT_PARAMETER_CONFIG)
+        super().__init__(parameter_config or SIR.DEFAULT_PARAMETER_CONFIG,
+                         integrator_backend)
 
-    def differential_equations(
+    def vectorized_equations(
             self, _,
-            compartments: Tuple[float, float, float],
-            *args: Tuple[float, ...]):
-        """Differential equations for this model.
+            compartments: np.ndarray,
+            params: Tuple) -> np.ndarray:
+        """Differential equations for this model over numpy arrays.
 
         Args:
             _: Timestep, which is not used.
-            compartments: Tuple of population in each compartment (S, I, R).
-            *args: Parameters used for the equations as a Tuple.
+            compartments: Array with the population in each compartment
+                (S, I, R, D).
+            params: Params as returned by `resolve_equation_params`.
 
         Returns:
-            Derivatives for each compartment.
+            Array with the derivatives for each compartment.
         """
         # pylint: disable=invalid-name,too-many-locals
         s, i, r, _ = compartments
         population = s + i + r
-        parameters = self.parameter_config.parse(args)
-        beta = parameters['beta']
-        gamma = parameters['gamma']
-        b = parameters['b']
-        mu = parameters['mu']
-        mu_i = parameters['mu_i']
-        cfr = parameters['cfr']
+        beta, gamma, b, mu, mu_i, cfr = params
 
         ds = (-beta * i / population + b - mu) * s
         di = (beta * s / population - gamma * (1 - cfr) - mu_i * cfr - mu) * i
         dr = gamma * (1 - cfr) * i - mu * r
         dd = mu_i * cfr * i
-        return ds, di, dr, dd
+        return np.array([ds, di, dr, dd])
 
     def compute_initial_state(
             self,
@@ -4,6 +4,7 @@ from typing import Optional
 from typing import Sequence
 from typing import Tuple
 import attr
+import numpy as np
 
 
 @attr.s(frozen=True)
@@ -25,6 +26,8 @@ class ParameterConfig:
             *parameters: The parameters that are part of this config.
         """
         self.parameters = parameters
+        self.indices = {
+            parameter.name: i for i, parameter in enumerate(parameters)}
 
     def flatten(self, values: Dict[str, float]):
         """Transform a dictionary of parameter values to a tuple."""
@@ -37,5 +40,16 @@ class ParameterConfig:
             for parameter, value in zip(self.parameters, values)
         }
 
+    def to_array(self, values: Dict[str, float]) -> np.ndarray:
+        """Transform a dictionary of parameter values to a float array."""
+        return np.array(self.flatten(values), dtype=np.float64)
+
+    def index(self, *names: str) -> Tuple[int, ...]:
+        """Get the positions of the given parameters in a flattened vector."""
+        return tuple(self.indices[name] for name in names)
+
+    def __len__(self):
+        return len(self.parameters)
+
     def __iter__(self):
         return iter(self.parameters)
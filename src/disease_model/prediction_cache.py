@@ -0,0 +1,101 @@
+"""Module with a bounded cache for model predictions."""
+import collections
+import threading
+from typing import Hashable
+from typing import Optional
+
+import numpy as np
+
+
+class PredictionCache():
+    """Least recently used cache for predicted compartments.
+
+    The cache is bounded both by number of entries and by the total size of
+    the stored arrays. Entries are stored read-only, so they can be handed
+    out without copying. All operations hold a lock, so a cache can be
+    shared by the threads of a pool.
+    """
+
+    def __init__(self,
+                 max_entries: int = 256,
+                 max_bytes: Optional[int] = 64 * 2 ** 20):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of predictions kept. Zero disables
+                the cache.
+            max_bytes: Maximum total size of the kept predictions, if any.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def make_key(cls, *parts) -> Hashable:
+        """Build a key from hashable parts and arrays.
+
+        Arrays are keyed by their dtype, shape and raw bytes.
+        """
+        key = []
+        for part in parts:
+            if isinstance(part, (np.ndarray, list, tuple)):
+                array = np.ascontiguousarray(part, dtype=np.float64)
+                part = (array.shape, array.tobytes())
+            key.append(part)
+        return tuple(key)
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """Get the stored prediction for the key, if any."""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: np.ndarray) -> np.ndarray:
+        """Store a prediction, evicting the least recently used ones.
+
+        Returns:
+            The stored read-only array.
+        """
+        if self.max_entries <= 0 or (
+                self.max_bytes is not None and value.nbytes > self.max_bytes):
+            return value
+        value = np.array(value)
+        value.flags.writeable = False
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key).nbytes
+            self.entries[key] = value
+            self.size += value.nbytes
+            while (len(self.entries) > self.max_entries or
+                   (self.max_bytes is not None and
+                    self.size > self.max_bytes)):
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.nbytes
+        return value
+
+    def clear(self):
+        """Drop all the stored predictions, keeping the counters."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self.entries)
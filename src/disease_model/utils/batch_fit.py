@@ -0,0 +1,173 @@
+"""Module for fitting models to many countries in one go."""
+from concurrent import futures
+import datetime
+import os
+import pickle
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from urllib import parse
+
+from help_project.src.disease_model import data
+from help_project.src.disease_model import fit_scheduler
+from help_project.src.disease_model.models import sir
+from help_project.src.disease_model.utils import data_fetcher
+from help_project.src.exitstrategies import lockdown_policy
+
+# Fetcher used by each worker process, created once when the worker starts.
+_WORKER_FETCHER = None
+
+
+def default_policy_data(
+        _, health_data: data.HealthData) -> lockdown_policy.LockdownTimeSeries:
+    """Policy time series with a single default policy over all the data."""
+    return lockdown_policy.LockdownTimeSeries(
+        policies=[
+            lockdown_policy.LockdownPolicyApplication(
+                policy=lockdown_policy.LockdownPolicy(),
+                start=health_data.index[0],
+                end=health_data.index[-1] + datetime.timedelta(days=1),
+            ),
+        ])
+
+
+def init_worker(fetcher_factory: Callable):
+    """Create the fetcher for the current worker process."""
+    global _WORKER_FETCHER  # pylint: disable=global-statement
+    _WORKER_FETCHER = fetcher_factory()
+
+
+def fit_country(country: str,
+                model_factory: Callable,
+                policy_data_fn: Callable) -> Dict:
+    """Fit a new model to a country using the worker's fetcher.
+
+    The slices are fit one after the other within the process, as the
+    parallelism comes from fitting several countries at once.
+
+    Returns:
+        Dictionary with the fitted params and parameter mapper.
+    """
+    population_data = _WORKER_FETCHER.get_population_data(country)
+    health_data = _WORKER_FETCHER.get_health_data(country)
+    if len(health_data) == 0:
+        raise ValueError('No health data for %s' % country)
+
+    model = model_factory()
+    model.fit_scheduler = fit_scheduler.FitScheduler(workers=1)
+    success = model.fit(
+        population_data, health_data, policy_data_fn(country, health_data))
+    return {
+        'success': success,
+        'params': model.get_params(),
+        'parameter_mapper': model.parameter_mapper,
+    }
+
+
+class BatchFitter():
+    """Fits a model to each country and stores the results as they finish.
+
+    Every country is fit on a pool of worker processes and its result is
+    written to its own file in the output directory as soon as it is ready.
+    Countries that already have a result are skipped, so an interrupted run
+    can be resumed by running it again.
+    """
+
+    def __init__(self,
+                 output_dir: str,
+                 model_factory: Callable = sir.SIR,
+                 policy_data_fn: Callable = default_policy_data,
+                 workers: Optional[int] = None,
+                 fetcher_factory: Callable = data_fetcher.DataFetcher):
+        """Initialize the batch fitter.
+
+        Args:
+            output_dir: Directory where the fitted results are stored.
+            model_factory: Callable returning a new compartment model.
+            policy_data_fn: Callable mapping the country and its health data
+                to the policy time series to fit on.
+            workers: Number of worker processes. Defaults to the CPU count.
+                With a single worker, countries are fit in this process.
+            fetcher_factory: Callable returning the data fetcher to use.
+        """
+        self.output_dir = output_dir
+        self.model_factory = model_factory
+        self.policy_data_fn = policy_data_fn
+        self.workers = workers or os.cpu_count() or 1
+        self.fetcher_factory = fetcher_factory
+        os.makedirs(output_dir, exist_ok=True)
+
+    def result_path(self, country: str) -> str:
+        """Path of the file holding the result for a country."""
+        return os.path.join(
+            self.output_dir, parse.quote(country, safe='') + '.pickle')
+
+    def completed_countries(self):
+        """Get the countries that already have a stored result."""
+        return {
+            parse.unquote(file_name[:-len('.pickle')])
+            for file_name in os.listdir(self.output_dir)
+            if file_name.endswith('.pickle')
+        }
+
+    def load(self, country: str) -> Dict:
+        """Load the stored result for a country."""
+        with open(self.result_path(country), 'rb') as result_file:
+            return pickle.load(result_file)
+
+    def save(self, country: str, result: Dict):
+        """Store the result for a country.
+
+        The file is written under a temporary name first, so a crash while
+        writing never leaves a partial result behind.
+        """
+        path = self.result_path(country)
+        with open(path + '.tmp', 'wb') as result_file:
+            pickle.dump(result, result_file)
+        os.replace(path + '.tmp', path)
+
+    def run(self,
+            countries: Optional[Iterable[str]] = None) -> Dict[str, Exception]:
+        """Fit all the given countries that have no stored result yet.
+
+        Args:
+            countries: Countries to fit. Defaults to all the countries
+                available from the fetcher.
+
+        Returns:
+            The errors raised by the countries that could not be fit. These
+            have no stored result, so they are retried on the next run.
+        """
+        if countries is None:
+            countries = self.fetcher_factory().get_countries()
+        completed = self.completed_countries()
+        pending = [c for c in countries if c not in completed]
+
+        errors = {}
+        if self.workers == 1:
+            init_worker(self.fetcher_factory)
+            for country in pending:
+                try:
+                    self.save(country, fit_country(
+                        country, self.model_factory, self.policy_data_fn))
+                except Exception as error:  # pylint: disable=broad-except
+                    errors[country] = error
+            return errors
+
+        with futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_worker,
+                initargs=(self.fetcher_factory,)) as pool:
+            scheduled = {
+                pool.submit(fit_country, country,
+                            self.model_factory, self.policy_data_fn): country
+                for country in pending
+            }
+            for future in futures.as_completed(scheduled):
+                country = scheduled[future]
+                if future.exception() is not None:
+                    errors[country] = future.exception()
+                else:
+                    self.save(country, future.result())
+        return errors
@@ -1,56 +1,451 @@
 """Module for getting country data."""
+import json
+import os
+import uuid
 from os import path
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
 import git
+import numpy as np
 import pandas as pd
 
 from help_project.src.disease_model import data
 
 
-def clean_df(health_df):
-    """Cleans the dataframe."""
-    health_df = health_df.sum(axis=0)
-    health_df = health_df[[d for d in health_df.index if d.find('/') > 0]].T
-    health_df.index = pd.to_datetime(health_df.index)
-    return health_df
+def build_country_index(
+        health_dfs: Sequence[pd.DataFrame]
+) -> Tuple[Dict[str, int], pd.DatetimeIndex, Sequence[np.ndarray]]:
+    """Aggregate the given time series per country into dense arrays.
+
+    Args:
+        health_dfs: Dataframes in the JHU format, with a 'zone' column and one
+            column per date.
+
+    Returns:
+        A tuple with the row of each country, the parsed dates shared by all
+        arrays, and one read-only float array of shape (countries, days) per
+        given dataframe. Countries missing from a dataframe are all zeros.
+    """
+    date_columns = [column for column in health_dfs[0].columns
+                    if column.find('/') > 0]
+    per_country = [df.groupby('zone')[date_columns].sum() for df in health_dfs]
+    countries = sorted(set().union(*[df.index for df in per_country]))
+
+    arrays = []
+    for df in per_country:
+        array = df.reindex(countries, fill_value=0).to_numpy(
+            dtype=np.float64)
+        array.flags.writeable = False
+        arrays.append(array)
+
+    country_rows = {country: row for row, country in enumerate(countries)}
+    dates = pd.to_datetime(date_columns, format='%m/%d/%y')
+    return country_rows, dates, arrays
+
+
+DATA_DIR = path.join(path.dirname(path.realpath(__file__)), '..', 'data')
+TIME_SERIES_DIR = path.join(
+    DATA_DIR, 'COVID-19', 'csse_covid_19_data', 'csse_covid_19_time_series')
+TIME_SERIES_FILES = {
+    'recovered': 'time_series_covid19_recovered_global.csv',
+    'deaths': 'time_series_covid19_deaths_global.csv',
+    'confirmed': 'time_series_covid19_confirmed_global.csv',
+}
+DAILY_REPORTS_DIR = path.join(
+    DATA_DIR, 'COVID-19', 'csse_covid_19_data', 'csse_covid_19_daily_reports')
+POPULATION_FILE = path.join(
+    DATA_DIR, 'population-figures-by-country-csv_csv.csv')
+CACHE_DIR = path.join(DATA_DIR, 'cache')
+# Arrays of health figures, and the matching columns of the daily reports
+HEALTH_KEYS = ('confirmed', 'recovered', 'deaths')
+REPORT_COLUMNS = ('Confirmed', 'Recovered', 'Deaths')
 
 
 def get_dfs():
     """Read the time series of deaths and infections from JHU data."""
-    dir_path = path.dirname(path.realpath(__file__))
-    data_dir = dir_path + '/../data/COVID-19/csse_covid_19_data/csse_covid_19_time_series/'
     rename = {'Country/Region': 'zone',
               'Province/State': 'sub_zone'}
-    df_recovery = pd.read_csv(
-        data_dir +
-        'time_series_covid19_recovered_global.csv').rename(columns=rename)
-    df_death = pd.read_csv(
-        data_dir +
-        'time_series_covid19_deaths_global.csv').rename(columns=rename)
-    df_confirmed = pd.read_csv(
-        data_dir +
-        'time_series_covid19_confirmed_global.csv').rename(columns=rename)
+    df_recovery = pd.read_csv(path.join(
+        TIME_SERIES_DIR, TIME_SERIES_FILES['recovered'])).rename(columns=rename)
+    df_death = pd.read_csv(path.join(
+        TIME_SERIES_DIR, TIME_SERIES_FILES['deaths'])).rename(columns=rename)
+    df_confirmed = pd.read_csv(path.join(
+        TIME_SERIES_DIR, TIME_SERIES_FILES['confirmed'])).rename(columns=rename)
     return df_recovery, df_death, df_confirmed
 
 
 def get_population():
     """Read the population from the population csv."""
-    dir_path = path.dirname(path.realpath(__file__))
-    population = pd.read_csv(
-        dir_path + '/../data/population-figures-by-country-csv_csv.csv')
+    population = pd.read_csv(POPULATION_FILE)
     population = population.set_index('Country')
     return population
 
 
+def get_health_sources() -> Sequence[str]:
+    """Paths of the JHU time series files."""
+    return [path.join(TIME_SERIES_DIR, file_name)
+            for file_name in TIME_SERIES_FILES.values()]
+
+
+def list_daily_reports(
+        directory: str,
+        after: pd.Timestamp) -> Sequence[Tuple[pd.Timestamp, str]]:
+    """List the JHU daily reports (MM-DD-YYYY.csv) after the given date.
+
+    Returns:
+        The date and path of each report, sorted by date.
+    """
+    reports = []
+    for file_name in os.listdir(directory):
+        try:
+            date = pd.to_datetime(file_name, format='%m-%d-%Y.csv')
+        except ValueError:
+            continue
+        if date > after:
+            reports.append((date, path.join(directory, file_name)))
+    return sorted(reports)
+
+
+def read_daily_report(file_path: str) -> pd.DataFrame:
+    """Read a JHU daily report with the cumulative figures per country."""
+    report = pd.read_csv(file_path).rename(
+        columns={'Country/Region': 'zone', 'Country_Region': 'zone'})
+    return report.groupby('zone')[list(REPORT_COLUMNS)].sum()
+
+
+def read_daily_reports(
+        directory: str,
+        after: pd.Timestamp) -> Tuple[pd.DatetimeIndex, List[pd.DataFrame]]:
+    """Read the JHU daily reports for the days following the given date.
+
+    Returns:
+        The dates of the reports and the reports themselves.
+
+    Raises:
+        ValueError: If a day is missing between the given date and the last
+            report.
+    """
+    reports = list_daily_reports(directory, after)
+    dates = pd.DatetimeIndex([date for date, _ in reports])
+    expected_dates = pd.date_range(
+        after + pd.Timedelta(days=1), periods=len(reports))
+    if not dates.equals(expected_dates):
+        raise ValueError('Missing daily reports between %s and %s' % (
+            after.date(), dates[-1].date()))
+    return dates, [read_daily_report(file_path) for _, file_path in reports]
+
+
+def merge_daily_reports(
+        daily_reports: Sequence[pd.DataFrame],
+        countries: Sequence[str],
+        last_day: Dict[str, np.ndarray]
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Merge daily reports into arrays of shape (countries, days).
+
+    Countries missing from a report keep their figures of the day before.
+
+    Args:
+        daily_reports: The reports of consecutive days.
+        countries: The countries of the rows of the arrays.
+        last_day: The figures of each country on the day before the reports,
+            per key of HEALTH_KEYS.
+
+    Returns:
+        The read-only array per key of HEALTH_KEYS, and which countries had
+        their figures move during the reported days.
+    """
+    arrays = {}
+    moved = np.zeros(len(countries), dtype=bool)
+    for key, column in zip(HEALTH_KEYS, REPORT_COLUMNS):
+        previous = last_day[key]
+        array = np.empty((len(countries), len(daily_reports)))
+        for day, report in enumerate(daily_reports):
+            values = np.array(
+                report[column].reindex(countries), dtype=np.float64)
+            missing = np.isnan(values)
+            values[missing] = previous[missing]
+            moved |= values != previous
+            array[:, day] = previous = values
+        array.flags.writeable = False
+        arrays[key] = array
+    return arrays, moved
+
+
+def block_key(key: str, block: int) -> str:
+    """Name in the cache of the array for a key of HEALTH_KEYS in a block.
+
+    The first block holds the time series, the following ones the days
+    appended by each refresh.
+    """
+    return key if block == 0 else '%s.%d' % (key, block)
+
+
+def source_signature(sources: Sequence[str]) -> Dict[str, Sequence[int]]:
+    """Identify the current version of the given files by mtime and size."""
+    signature = {}
+    for source in sources:
+        stat = os.stat(source)
+        signature[path.realpath(source)] = [stat.st_mtime_ns, stat.st_size]
+    return signature
+
+
+def load_cached(name: str,
+                sources: Sequence[str],
+                build: Callable[[], Tuple[Dict, Dict[str, np.ndarray]]],
+                cache_dir: Optional[str] = None
+                ) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Load arrays derived from the given source files, caching them on disk.
+
+    The arrays are stored as .npy files next to a JSON sidecar holding the
+    metadata and the signature of the sources they were built from. If any
+    source has changed since, they are rebuilt. Cached arrays are memory
+    mapped read-only, so worker processes share the pages.
+
+    Args:
+        name: Name of the cache entry.
+        sources: Files the arrays are derived from.
+        build: Callable returning the JSON serializable metadata and a
+            dictionary of arrays, used when the cache is missing or stale.
+        cache_dir: Directory holding the cache. Defaults to CACHE_DIR.
+
+    Returns:
+        The metadata and arrays.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    sidecar_path = path.join(cache_dir, name + '.json')
+    try:
+        with open(sidecar_path, encoding='utf-8') as sidecar_file:
+            sidecar = json.load(sidecar_file)
+        if sidecar['sources'] == source_signature(sources):
+            return sidecar['metadata'], {
+                key: np.load(path.join(cache_dir, file_name), mmap_mode='r')
+                for key, file_name in sidecar['arrays'].items()
+            }
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass  # Missing or unreadable cache, rebuild it.
+
+    metadata, arrays = build()
+    save_cached(name, sources, metadata, arrays, cache_dir)
+    return metadata, arrays
+
+
+def save_cached(name: str,
+                sources: Sequence[str],
+                metadata: Dict,
+                arrays: Dict[str, np.ndarray],
+                cache_dir: Optional[str] = None):
+    """Store a cache entry as read by `load_cached`.
+
+    Each write uses new array file names and the sidecar is replaced last, so
+    readers (including ones with the previous arrays memory mapped) never see
+    a mix of old and new files.
+
+    Args:
+        name: Name of the cache entry.
+        sources: Files the arrays are derived from, in their current state.
+        metadata: JSON serializable metadata.
+        arrays: Dictionary of arrays to store.
+        cache_dir: Directory holding the cache. Defaults to CACHE_DIR.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    file_names = write_arrays(name, arrays, cache_dir)
+    write_sidecar(name, sources, metadata, file_names, cache_dir)
+
+    # Mapped arrays stay valid after their file is removed
+    for file_name in os.listdir(cache_dir):
+        if (file_name.startswith(name + '.') and file_name.endswith('.npy')
+                and file_name not in file_names.values()):
+            os.remove(path.join(cache_dir, file_name))
+
+
+def append_cached(name: str,
+                  sources: Sequence[str],
+                  metadata: Dict,
+                  arrays: Dict[str, np.ndarray],
+                  cache_dir: Optional[str] = None) -> bool:
+    """Add arrays to a stored cache entry, keeping the arrays already there.
+
+    Only the new arrays and the sidecar are written.
+
+    Args:
+        name: Name of the cache entry.
+        sources: Files the arrays are derived from, in their current state.
+        metadata: JSON serializable metadata, replacing the stored one.
+        arrays: Dictionary of arrays to add.
+        cache_dir: Directory holding the cache. Defaults to CACHE_DIR.
+
+    Returns:
+        Whether the entry was updated, which requires a readable sidecar.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    try:
+        with open(path.join(cache_dir, name + '.json'),
+                  encoding='utf-8') as sidecar_file:
+            file_names = dict(json.load(sidecar_file)['arrays'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    file_names.update(write_arrays(name, arrays, cache_dir))
+    write_sidecar(name, sources, metadata, file_names, cache_dir)
+    return True
+
+
+def write_arrays(name: str,
+                 arrays: Dict[str, np.ndarray],
+                 cache_dir: str) -> Dict[str, str]:
+    """Write arrays of a cache entry under new file names.
+
+    Returns:
+        The file name of each array.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    version = uuid.uuid4().hex
+    file_names = {key: '%s.%s.%s.npy' % (name, key, version)
+                  for key in arrays}
+    for key, array in arrays.items():
+        np.save(path.join(cache_dir, file_names[key]), array)
+    return file_names
+
+
+def write_sidecar(name: str,
+                  sources: Sequence[str],
+                  metadata: Dict,
+                  file_names: Dict[str, str],
+                  cache_dir: str):
+    """Atomically replace the sidecar of a cache entry."""
+    sidecar_path = path.join(cache_dir, name + '.json')
+    with open(sidecar_path + '.tmp', 'w', encoding='utf-8') as sidecar_file:
+        json.dump({'sources': source_signature(sources),
+                   'metadata': metadata,
+                   'arrays': file_names}, sidecar_file)
+    os.replace(sidecar_path + '.tmp', sidecar_path)
+
+
+def build_health_cache() -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Build the cache entry for the JHU time series."""
+    df_recovery, df_death, df_confirmed = get_dfs()
+    country_rows, dates, arrays = build_country_index(
+        [df_confirmed, df_recovery, df_death])
+    metadata = {
+        'countries': sorted(country_rows, key=country_rows.get),
+        'dates': [date.strftime('%Y-%m-%d') for date in dates],
+        'blocks': 1,
+    }
+    return metadata, dict(zip(HEALTH_KEYS, arrays))
+
+
+def build_population_cache() -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Build the cache entry for the population figures."""
+    population = get_population().Year_2016
+    return ({'countries': list(population.index)},
+            {'population': population.to_numpy(dtype=np.float64)})
+
+
 class DataFetcher():
     """Class for fetching data."""
 
-    def __init__(self):
-        dir_path = path.dirname(path.realpath(__file__))
-        if not path.exists(dir_path + '/../data/COVID-19'):
-            git.Git(
-                dir_path + '/../data/').clone('https://github.com/CSSEGISandData/COVID-19.git')
-        self.recovered_cases, self.deaths, self.confirmed_cases = get_dfs()
-        self.population = get_population().Year_2016.to_dict()
+    def __init__(self, use_cache: bool = True):
+        """Initialize the fetcher.
+
+        Args:
+            use_cache: Whether to load the data from the binary cache, which
+                is built from the CSV files the first time they are read.
+        """
+        if not path.exists(path.join(DATA_DIR, 'COVID-19')):
+            git.Git(DATA_DIR).clone('https://github.com/CSSEGISandData/COVID-19.git')
+
+        self.use_cache = use_cache
+        if use_cache:
+            health_metadata, health_arrays = load_cached(
+                'health', get_health_sources(), build_health_cache)
+            population_metadata, population_arrays = load_cached(
+                'population', [POPULATION_FILE], build_population_cache)
+        else:
+            health_metadata, health_arrays = build_health_cache()
+            population_metadata, population_arrays = build_population_cache()
+
+        self.country_rows = {
+            country: row
+            for row, country in enumerate(health_metadata['countries'])}
+        self.dates = pd.DatetimeIndex(health_metadata['dates'])
+        # Arrays of shape (countries so far, days) per key of HEALTH_KEYS,
+        # for consecutive ranges of days. Rows of the countries that were
+        # not known yet are left out.
+        self.blocks = [
+            {key: health_arrays[block_key(key, block)] for key in HEALTH_KEYS}
+            for block in range(health_metadata.get('blocks', 1))]
+        self.population = dict(zip(
+            population_metadata['countries'],
+            population_arrays['population'].tolist()))
+
+    def refresh(self,
+                daily_reports_dir: Optional[str] = None,
+                pull: bool = False) -> Set[str]:
+        """Append the days that are missing from the loaded data.
+
+        Only the daily reports after the last loaded date are read, and the
+        new days are added as a new block of arrays, also appended to the
+        cache. The cost is proportional to the number of new days, the
+        loaded data is not copied. Revisions to days that were already
+        loaded are only picked up by a full reload.
+
+        Args:
+            daily_reports_dir: Directory with JHU daily reports. Defaults to
+                the daily reports of the local clone.
+            pull: Whether to pull the latest data into the local clone first.
+
+        Returns:
+            The countries whose data changed, which are the ones that are
+            new or whose figures moved during the new days.
+        """
+        if pull:
+            git.Repo(path.join(DATA_DIR, 'COVID-19')).remotes.origin.pull()
+        new_dates, daily_reports = read_daily_reports(
+            daily_reports_dir or DAILY_REPORTS_DIR, self.dates[-1])
+        if not daily_reports:
+            return set()
+
+        countries = list(self.country_rows)
+        new_countries = sorted(
+            set().union(*[report.index for report in daily_reports]) -
+            set(countries))
+        countries += new_countries
+        block, moved = merge_daily_reports(
+            daily_reports, countries, self.last_day(len(countries)))
+
+        self.country_rows.update(
+            (country, row) for row, country in enumerate(
+                new_countries, len(self.country_rows)))
+        self.dates = self.dates.append(new_dates)
+        self.blocks.append(block)
+        if self.use_cache:
+            append_cached('health', get_health_sources(), {
+                'countries': countries,
+                'dates': [date.strftime('%Y-%m-%d') for date in self.dates],
+                'blocks': len(self.blocks),
+            }, {block_key(key, len(self.blocks) - 1): array
+                for key, array in block.items()})
+        return set(new_countries) | set(np.array(countries)[moved])
+
+    def last_day(self, count: int) -> Dict[str, np.ndarray]:
+        """Get the figures of the last loaded day for the first countries.
+
+        Args:
+            count: Number of countries, the ones not known yet are zeros.
+
+        Returns:
+            The figures per key of HEALTH_KEYS.
+        """
+        last_day = {}
+        for key, array in self.blocks[-1].items():
+            values = np.zeros(count)
+            values[:len(array)] = array[:, -1]
+            last_day[key] = values
+        return last_day
 
     def get_countries(self):
         """Get the available country names."""
@@ -61,14 +456,32 @@ class DataFetcher():
         return data.PopulationData(population_size=self.population[country],
                                    demographics=None)
 
+    def get_health_arrays(self, country: str) -> Dict[str, np.ndarray]:
+        """Get the historical figures per key of HEALTH_KEYS for a country.
+
+        With a single cached block these are views of the read-only memory
+        maps, so nothing is copied and they can't be modified in place.
+        """
+        row = self.country_rows.get(country)
+        arrays = {}
+        for key in HEALTH_KEYS:
+            parts = [
+                block[key][row] if row is not None and row < len(block[key])
+                else np.zeros(block[key].shape[1])
+                for block in self.blocks]
+            arrays[key] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return arrays
+
     def get_health_data(self, country: str):
-        """Get the historical health data for a given country."""
-        confirmed_cases = clean_df(self.confirmed_cases[(
-            self.confirmed_cases['zone'] == country)])
-        recovered = clean_df(self.recovered_cases[(
-            self.recovered_cases['zone'] == country)])
-        deaths = clean_df(self.deaths[(
-            self.deaths['zone'] == country)])
-        return data.HealthData(confirmed_cases=confirmed_cases,
-                               recovered=recovered,
-                               deaths=deaths)
+        """Get the historical health data for a given country.
+
+        The series own their data, so callers are free to modify them.
+        """
+        arrays = self.get_health_arrays(country)
+
+        def get_series(key):
+            return pd.Series(arrays[key], index=self.dates, copy=True)
+
+        return data.HealthData(confirmed_cases=get_series('confirmed'),
+                               recovered=get_series('recovered'),
+                               deaths=get_series('deaths'))
@@ -2,12 +2,32 @@
 This defines a very basic economic model, this is going to change in the future
 """
 from typing import Dict
+from typing import Sequence
 import attr
 import numpy as np
+import pandas as pd
 from help_project.src.economic_model.utils import gva_data
 from help_project.src.exitstrategies import lockdown_policy as lockdown
 
 
+# Fraction of the baseline GVA produced each day at full productivity
+DAILY_FRACTION = 1 / 365 / 4
+
+
+@attr.s(frozen=True)
+class EconomicOutput:  # pylint: disable=too-few-public-methods
+    """Struct for holding the daily economic output of a policy time series."""
+    daily: pd.DataFrame = attr.ib(eq=False)
+    cumulative: pd.DataFrame = attr.ib(eq=False)
+
+    @property
+    def totals(self) -> Dict[str, float]:
+        """Get the total output of each sector over the whole time series."""
+        if self.cumulative.empty:
+            return {sector: 0. for sector in self.cumulative.columns}
+        return self.cumulative.iloc[-1].to_dict()
+
+
 class EconomicLockdownModel():
     """
     Class for basic Economic lockdown model, this just multiplies the
@@ -17,35 +37,96 @@ class EconomicLockdownModel():
 
     def __init__(self, country=None):
         self.country = country
+        self.fields = lockdown.POLICY_FIELDS
 
-    def _get_economic_vector_for_single_policy(self, lockdown_policy: lockdown.LockdownPolicy):
-        lockdown_policy = attr.asdict(lockdown_policy)
         gva = gva_data.BaseGVA()
-        sector_mappings = gva.get_sector_mapping()
-        sector_mappings = sector_mappings.dropna()
-        mapping_dict = {}
-        for i in range(len(sector_mappings)):
-            if sector_mappings.iloc[i]['sector'] not in mapping_dict:
-                mapping_dict[sector_mappings.iloc[i]['sector']] = \
-                    [sector_mappings.iloc[i]['lockdown_sector']]
-            else:
-                mapping_dict[sector_mappings.iloc[i]['sector']].append(
-                    sector_mappings.iloc[i]['lockdown_sector'])
-
+        sector_mappings = gva.get_sector_mapping().dropna()
         baseline_gva = gva.get_gvas()
-        adjusted_gva = {}
-        for key in mapping_dict:
-            if key not in baseline_gva:
-                continue
-            weights = []
-            for sector in mapping_dict[key]:
-                if sector in lockdown_policy:
-                    weights.append(lockdown_policy[sector])
-            if len(weights) > 0:
-                adjusted_gva[key] = baseline_gva[key] * np.mean(weights)
-            else:
-                adjusted_gva[key] = baseline_gva[key]
-        return adjusted_gva
+        # Keep the sectors in order of first appearance in the mapping
+        self.sectors = [
+            sector for sector in dict.fromkeys(sector_mappings['sector'])
+            if sector in baseline_gva]
+        self.baseline = np.array(
+            [baseline_gva[sector] for sector in self.sectors], dtype=np.float64)
+
+        # The productivity of a sector is the mean of its mapped lockdown
+        # fields, or 1 if it has none.
+        sector_index = {sector: i for i, sector in enumerate(self.sectors)}
+        field_index = {field: i for i, field in enumerate(self.fields)}
+        self.weights = np.zeros((len(self.sectors), len(self.fields)))
+        for sector, field in zip(sector_mappings['sector'],
+                                 sector_mappings['lockdown_sector']):
+            if sector in sector_index and field in field_index:
+                self.weights[sector_index[sector], field_index[field]] += 1
+        counts = self.weights.sum(axis=1, keepdims=True)
+        self.weights /= np.maximum(counts, 1)
+        self.offset = (counts[:, 0] == 0).astype(np.float64)
+
+    def get_sector_outputs(
+            self, policies: Sequence[lockdown.LockdownPolicy]) -> np.ndarray:
+        """Compute the adjusted GVA of each sector for many policies at once.
+
+        Args:
+            policies: The policies to evaluate, or a PolicyMatrix of them.
+
+        Returns:
+            Array of shape (len(policies), len(self.sectors)).
+        """
+        policy_matrix = lockdown.PolicyMatrix.from_policies(policies)
+        productivity = policy_matrix.array @ self.weights.T + self.offset
+        return productivity * self.baseline
+
+    def _get_economic_vector_for_single_policy(self, lockdown_policy: lockdown.LockdownPolicy):
+        adjusted_gva = self.get_sector_outputs([lockdown_policy])[0]
+        return dict(zip(self.sectors, adjusted_gva.tolist()))
+
+    def get_daily_outputs(
+            self, timeseries: Sequence[lockdown.LockdownTimeSeries]) -> np.ndarray:
+        """Compute the daily GVA of each sector for many policy time series.
+
+        Each distinct policy is evaluated once, and its output is repeated
+        over the days it is applied.
+
+        Args:
+            timeseries: Time-series of policies to use, all of the same length.
+
+        Returns:
+            Array of shape (len(timeseries), days, len(self.sectors)).
+        """
+        lengths = {len(series) for series in timeseries}
+        if len(lengths) > 1:
+            raise ValueError('Time series have different lengths: %s' % sorted(lengths))
+        days = lengths.pop() if lengths else 0
+
+        policy_index = {}
+        rows = []
+        repeats = []
+        for series in timeseries:
+            for policy_application in series.policies:
+                rows.append(policy_index.setdefault(
+                    policy_application.policy, len(policy_index)))
+                repeats.append(len(policy_application))
+        outputs = self.get_sector_outputs(list(policy_index)) * DAILY_FRACTION
+        daily = np.repeat(outputs[np.array(rows, dtype=np.int64)], repeats, axis=0)
+        return daily.reshape(len(timeseries), days, len(self.sectors))
+
+    def get_economic_output(
+            self, lockdown_policy: lockdown.LockdownTimeSeries) -> EconomicOutput:
+        """Compute the daily and cumulative economic output of a policy.
+
+        Args:
+            lockdown_policy: Time-series of policies to use.
+
+        Returns:
+            The daily and cumulative GVA of each sector, indexed by date.
+        """
+        daily = self.get_daily_outputs([lockdown_policy])[0]
+        index = lockdown_policy.dates()
+        return EconomicOutput(
+            daily=pd.DataFrame(daily, index=index, columns=self.sectors),
+            cumulative=pd.DataFrame(
+                np.cumsum(daily, axis=0), index=index, columns=self.sectors),
+        )
 
     def get_economic_vector(
             self, lockdown_policy: lockdown.LockdownTimeSeries) -> Dict[str, float]:
@@ -55,14 +136,8 @@ class EconomicLockdownModel():
             lockdown_policy: Time-series of policies to use.
 
         Returns:
-            A dictionary containing adjusted GVA for different sectors.
+            A dictionary containing adjusted GVA for different sectors,
+            summed over the whole time series.
         """
-        output = {}
-        for policy_application in lockdown_policy.policies:
-            policy_output = self._get_economic_vector_for_single_policy(
-                policy_application.policy)
-            for key, value in policy_output.items():
-                if key not in output:
-                    output[key] = 0
-                output[key] = value / 365 / 4 * len(policy_application)
-        return output
+        totals = self.get_daily_outputs([lockdown_policy])[0].sum(axis=0)
+        return dict(zip(self.sectors, totals.tolist()))
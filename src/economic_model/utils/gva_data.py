@@ -1,23 +1,59 @@
 """
 file to get the gva data for india
 """
+import functools
 from os import path
+import types
+from typing import Mapping
+import attr
 import pandas as pd
 
+DATA_DIR = path.join(path.dirname(path.realpath(__file__)), '..', 'data')
+
+
+@attr.s(frozen=True)
+class GVAData:  # pylint: disable=too-few-public-methods
+    """Immutable struct holding the GVA dataset."""
+    gva_mapping: Mapping[str, float] = attr.ib()
+    sector_mapping: pd.DataFrame = attr.ib(eq=False)
+
+
+@functools.lru_cache(maxsize=None)
+def load_gva_data(data_dir: str = DATA_DIR) -> GVAData:
+    """
+    read the GVA dataset, once per process and data directory
+
+    The result is shared by every caller, so it must not be modified.
+    """
+    gva_df = pd.read_csv(path.join(data_dir, "gva_data.csv"))
+    gva_df = gva_df.loc[~gva_df['2019'].isna()]
+    gva_df = gva_df.set_index("Industry")
+    mapping_df = pd.read_csv(path.join(data_dir, "sector_mapping.csv"))
+    return GVAData(
+        gva_mapping=types.MappingProxyType(gva_df['2019'].to_dict()),
+        sector_mapping=mapping_df,
+    )
+
+
+def preload(data_dir: str = DATA_DIR):
+    """
+    load the GVA dataset into the process cache
+
+    Calling this before starting a pool of forked workers lets them share
+    the parent's copy, and it can also be used as the pool's initializer so
+    each worker reads the files once before running any task.
+    """
+    load_gva_data(data_dir)
+
 
 class BaseGVA():
     """
     class for Base GVA
     """
-    def __init__(self):
-        dir_path = path.dirname(path.realpath(__file__))
-        gva_df = pd.read_csv(dir_path + "/../data/gva_data.csv")
-        gva_df = gva_df.loc[~gva_df['2019'].isna()]
-        gva_df = gva_df.set_index("Industry")
-        self.gva_mapping = gva_df['2019'].to_dict()
-
-        mapping_df = pd.read_csv(dir_path + "/../data/sector_mapping.csv")
-        self.sector_mapping = mapping_df
+    def __init__(self, data_dir: str = DATA_DIR):
+        data = load_gva_data(data_dir)
+        self.gva_mapping = data.gva_mapping
+        self.sector_mapping = data.sector_mapping
 
     def get_gvas(self):
         """
@@ -30,4 +66,4 @@ class BaseGVA():
         """
         return the mapping from our sectors to lockdown team's sectors
         """
-        return self.sector_mapping
\ No newline at end of file
+        return self.sector_mapping.copy()
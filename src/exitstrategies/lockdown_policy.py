@@ -1,8 +1,12 @@
 """Data structures for lockdown policies."""
 import datetime
+from typing import Iterator
 from typing import Optional
 from typing import Sequence
+from typing import Tuple
 import attr
+import numpy as np
+import pandas as pd
 
 
 @attr.s(frozen=True)
@@ -50,6 +54,92 @@ class LockdownPolicy:
     contact_tracing: float = attr.ib(default=0.0)
     covid_testing: float = attr.ib(default=0.0)
 
+    def to_array(self) -> np.ndarray:
+        """Get the fields as a read-only float64 array, in POLICY_FIELDS order.
+
+        The array is computed once per policy, later calls return it as is.
+        """
+        array = self.__dict__.get('_array')
+        if array is None:
+            array = np.array([getattr(self, name) for name in POLICY_FIELDS],
+                             dtype=np.float64)
+            array.flags.writeable = False
+            # Frozen instances can still cache derived values
+            object.__setattr__(self, '_array', array)
+        return array
+
+    @classmethod
+    def from_array(cls, values: Sequence[float]) -> 'LockdownPolicy':
+        """Build a policy from its fields, in POLICY_FIELDS order."""
+        array = np.array(values, dtype=np.float64)
+        if array.shape != (len(POLICY_FIELDS),):
+            raise ValueError('Expected %d policy values, got shape %s' % (
+                len(POLICY_FIELDS), array.shape))
+        policy = cls(**dict(zip(POLICY_FIELDS, array.tolist())))
+        array.flags.writeable = False
+        object.__setattr__(policy, '_array', array)
+        return policy
+
+
+def _to_datetime64(date) -> np.datetime64:
+    """Convert a date or datetime to a datetime64 in nanoseconds."""
+    return pd.Timestamp(date).to_datetime64()
+
+
+# Canonical order of the policy fields in their array representation
+POLICY_FIELDS = tuple(field.name for field in attr.fields(LockdownPolicy))
+
+
+class PolicyMatrix():
+    """Container for many policies as a contiguous (policies, fields) array.
+
+    Rows follow the POLICY_FIELDS order, so they can be fed to vectorized
+    code directly. Policies are only built when accessed.
+    """
+
+    def __init__(self, array: np.ndarray):
+        """Initialize the matrix.
+
+        Args:
+            array: Array of shape (policies, len(POLICY_FIELDS)).
+        """
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        if array.ndim != 2 or array.shape[1] != len(POLICY_FIELDS):
+            raise ValueError('Expected shape (n, %d), got %s' % (
+                len(POLICY_FIELDS), array.shape))
+        self.array = array
+
+    @classmethod
+    def from_policies(cls, policies: Sequence[LockdownPolicy]) -> 'PolicyMatrix':
+        """Stack the given policies into a matrix."""
+        if isinstance(policies, PolicyMatrix):
+            return policies
+        array = np.empty((len(policies), len(POLICY_FIELDS)))
+        for i, policy in enumerate(policies):
+            array[i] = policy.to_array()
+        return cls(array)
+
+    @property
+    def fields(self):
+        """Get the names of the columns."""
+        return POLICY_FIELDS
+
+    def column(self, name: str) -> np.ndarray:
+        """Get the values of a field for all the policies."""
+        return self.array[:, POLICY_FIELDS.index(name)]
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return LockdownPolicy.from_array(self.array[key])
+        return PolicyMatrix(self.array[key])
+
+    def __iter__(self) -> Iterator[LockdownPolicy]:
+        for i in range(len(self)):
+            yield self[i]
+
 
 @attr.s(frozen=True)
 class LockdownPolicyApplication:  # pylint: disable=too-few-public-methods
@@ -83,6 +173,87 @@ class LockdownTimeSeries:  # pylint: disable=too-few-public-methods
         """Get the end of the time series."""
         return self.policies[-1].end if self.policies else None
 
+    def intervals(self) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """Get the start and end of each policy application as datetime64.
+
+        Applications with no end get the maximum datetime64 as their end. The
+        arrays are computed once per time series.
+
+        Returns:
+            The starts, the ends, and whether the applications are sorted and
+            do not overlap, which allows for binary search.
+        """
+        intervals = self.__dict__.get('_intervals')
+        if intervals is None:
+            starts = np.array([_to_datetime64(p.start) for p in self.policies],
+                              dtype='datetime64[ns]')
+            ends = np.array([_to_datetime64(p.end) if p.end is not None
+                             else np.datetime64(pd.Timestamp.max)
+                             for p in self.policies], dtype='datetime64[ns]')
+            ordered = bool(np.all(ends[:-1] <= starts[1:]))
+            intervals = (starts, ends, ordered)
+            # Frozen instances can still cache derived values
+            object.__setattr__(self, '_intervals', intervals)
+        return intervals
+
+    def dates(self) -> pd.DatetimeIndex:
+        """Get the date of each day covered by the policy applications.
+
+        Each application contributes len(application) days from its own
+        start, so gaps between applications don't shift the later dates.
+        """
+        starts = self.intervals()[0]
+        lengths = np.array([len(p) for p in self.policies], dtype=np.int64)
+        days = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths)
+        return pd.DatetimeIndex(
+            np.repeat(starts, lengths) + days.astype('timedelta64[D]'))
+
+    def policy_index(self, key) -> int:
+        """Get the index of the policy application in force at a date.
+
+        Args:
+            key: The date, or an offset in days from the start of the series.
+
+        Returns:
+            The index in policies, or -1 if none applies at that date.
+        """
+        if isinstance(key, int):
+            key = self._date_with_offset(key)
+        date = _to_datetime64(key)
+        starts, ends, ordered = self.intervals()
+        if ordered:
+            index = int(np.searchsorted(starts, date, side='right')) - 1
+            return index if index >= 0 and date < ends[index] else -1
+        for index, (start, end) in enumerate(zip(starts, ends)):
+            if start <= date < end:
+                return index
+        return -1
+
+    def policy_indices_for(self, dates) -> np.ndarray:
+        """Get the index of the policy application in force at each date.
+
+        Args:
+            dates: The dates to look up, e.g. a DatetimeIndex.
+
+        Returns:
+            Integer array with the index in policies for each date, or -1 for
+            dates not covered by any application.
+        """
+        dates = pd.DatetimeIndex(dates).values
+        starts, ends, ordered = self.intervals()
+        indices = np.full(len(dates), -1, dtype=np.int64)
+        if ordered:
+            candidates = np.searchsorted(starts, dates, side='right') - 1
+            valid = candidates >= 0
+            valid[valid] = dates[valid] < ends[candidates[valid]]
+            indices[valid] = candidates[valid]
+        else:
+            # The first application covering a date wins
+            for i in reversed(range(len(self.policies))):
+                indices[(starts[i] <= dates) & (dates < ends[i])] = i
+        return indices
+
     def __getitem__(self, key):
         if not self.policies:
             raise IndexError('Empty lockdown time series does not support slicing')
@@ -93,9 +264,18 @@ class LockdownTimeSeries:  # pylint: disable=too-few-public-methods
                 raise IndexError('Slicing a lockdown time series does not support a step size.')
             start = self._standardize_index(key.start or self.start)
             end = self._standardize_index(key.stop or self.end)
+
+            starts, ends, ordered = self.intervals()
+            if ordered:
+                # Only the applications between these can be in range
+                first = np.searchsorted(ends, _to_datetime64(start), side='right')
+                last = np.searchsorted(starts, _to_datetime64(end), side='left')
+                candidates = self.policies[first:last]
+            else:
+                candidates = self.policies
             policies_in_range = [
                 policy
-                for policy in self.policies
+                for policy in candidates
                 if (policy.start < end and
                     (policy.end is None or policy.end > start))
             ]
@@ -109,14 +289,10 @@ class LockdownTimeSeries:  # pylint: disable=too-few-public-methods
                     ) for p in policies_in_range])
 
         # Retrieving by index uses it as an offset from the start date
-        if isinstance(key, int):
-            key = self._date_with_offset(key)
-
-        # Retrieve by date
-        for policy in self.policies:
-            if policy.start <= key and (policy.end is None or policy.end > key):
-                return policy.policy
-        raise IndexError('Given index not found in time series')
+        index = self.policy_index(key)
+        if index < 0:
+            raise IndexError('Given index not found in time series')
+        return self.policies[index].policy
 
     def _standardize_index(self, idx):
         if isinstance(idx, int):
@@ -0,0 +1,202 @@
+"""Module for analysing the points evaluated by an optimizer."""
+import bisect
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+from help_project.src.optimization import loss_function
+
+
+def loss_array(losses: Sequence) -> np.ndarray:
+    """Convert losses to an array of shape (len(losses), objectives)."""
+    if isinstance(losses, np.ndarray) and losses.ndim == 2:
+        return losses.astype(np.float64, copy=False)
+    values = np.array([np.ravel(np.asarray(loss, dtype=np.float64))
+                       for loss in losses])
+    if len(losses) == 0:
+        return values.reshape(0, 0)
+    if values.ndim != 2:
+        raise ValueError('Losses have different length')
+    return values
+
+
+def nondominated_sort(losses: Sequence) -> np.ndarray:
+    """Compute the non-dominated rank of each loss.
+
+    Rank 0 is the pareto frontier, rank 1 the frontier once those points are
+    removed, and so on. Equal losses always get the same rank.
+
+    Args:
+        losses: The losses to rank.
+
+    Returns:
+        Integer array with the rank of each loss.
+    """
+    values = loss_array(losses)
+    n = len(values)
+    ranks = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return ranks
+
+    if values.shape[1] == 2:
+        # Sweep in lexicographic order, where earlier losses can't be
+        # dominated by later ones. Each loss goes to the first front whose
+        # best second loss so far is worse than its own, and these bests
+        # grow with the rank so the front can be found by binary search.
+        order = np.lexsort((values[:, 1], values[:, 0]))
+        front_best = []
+        previous = None
+        rank = 0
+        for i in order:
+            current = (values[i, 0], values[i, 1])
+            if current != previous:
+                rank = bisect.bisect_right(front_best, current[1])
+                if rank == len(front_best):
+                    front_best.append(current[1])
+                else:
+                    front_best[rank] = current[1]
+                previous = current
+            ranks[i] = rank
+        return ranks
+
+    # Peel off one front at a time
+    remaining = np.arange(n)
+    rank = 0
+    while len(remaining):
+        mask = loss_function.nondominated_mask(values[remaining])
+        ranks[remaining[mask]] = rank
+        remaining = remaining[~mask]
+        rank += 1
+    return ranks
+
+
+def fronts(records: Sequence[Tuple]) -> List[List[Tuple]]:
+    """Group (point, loss) records by their non-dominated rank.
+
+    Args:
+        records: The (point, loss) pairs, e.g. ExhaustiveSearch.records.
+
+    Returns:
+        One list of records per rank, starting with the pareto frontier.
+        Records keep their original order within each list.
+    """
+    ranks = nondominated_sort([loss for _, loss in records])
+    grouped = [[] for _ in range(ranks.max() + 1 if len(ranks) else 0)]
+    for record, rank in zip(records, ranks):
+        grouped[rank].append(record)
+    return grouped
+
+
+def crowding_distance(losses: Sequence) -> np.ndarray:
+    """Compute how isolated each loss is from the others.
+
+    For each objective, a loss gets the normalized distance between its two
+    neighbours along that objective. The losses at the ends get an infinite
+    distance, so they are always preferred.
+
+    Args:
+        losses: The losses, usually the ones in a single front.
+
+    Returns:
+        Float array with the crowding distance of each loss.
+    """
+    values = loss_array(losses)
+    n = len(values)
+    distances = np.zeros(n)
+    if n <= 2:
+        distances[:] = np.inf
+        return distances
+    for column in values.T:
+        order = np.argsort(column, kind='stable')
+        span = column[order[-1]] - column[order[0]]
+        if span > 0:
+            distances[order[1:-1]] += (
+                column[order[2:]] - column[order[:-2]]) / span
+        distances[order[[0, -1]]] = np.inf
+    return distances
+
+
+def hypervolume(losses: Sequence,
+                reference: Optional[Sequence[float]] = None) -> float:
+    """Compute the hypervolume dominated by the losses.
+
+    This is the volume of the region that is worse than some loss but better
+    than the reference point, so higher is better.
+
+    Args:
+        losses: The losses to measure.
+        reference: Worst value for each objective. Losses that are not better
+            than it on every objective do not add any volume. Defaults to the
+            worst value of each objective among the losses.
+
+    Returns:
+        The dominated hypervolume.
+    """
+    values = loss_array(losses)
+    if len(values) == 0:
+        return 0.
+    if reference is None:
+        reference = values.max(axis=0)
+    reference = np.asarray(reference, dtype=np.float64)
+    values = values[np.all(values < reference, axis=1)]
+    return _hypervolume(values, reference)
+
+
+def _hypervolume(values: np.ndarray, reference: np.ndarray) -> float:
+    """Hypervolume of losses that are all better than the reference."""
+    if len(values) == 0:
+        return 0.
+    if values.shape[1] == 1:
+        return float(reference[0] - values[:, 0].min())
+    values = values[loss_function.nondominated_mask(values)]
+    if values.shape[1] == 2:
+        # Along the frontier the second loss decreases as the first grows
+        values = values[np.argsort(values[:, 0], kind='stable')]
+        widths = np.diff(np.append(values[:, 0], reference[0]))
+        return float(np.dot(widths, reference[1] - values[:, 1]))
+
+    # Slice along the last objective, each slice being the hypervolume of
+    # the losses below it in one dimension less.
+    values = values[np.argsort(values[:, -1], kind='stable')]
+    heights = np.diff(np.append(values[:, -1], reference[-1]))
+    return float(sum(
+        _hypervolume(values[:i + 1, :-1], reference[:-1]) * height
+        for i, height in enumerate(heights) if height > 0))
+
+
+def hypervolume_trace(records: Sequence[Tuple],
+                      reference: Optional[Sequence[float]] = None
+                      ) -> np.ndarray:
+    """Compute the hypervolume of the frontier after each record.
+
+    This tracks the convergence of a search from its records, without
+    running it again.
+
+    Args:
+        records: The (point, loss) pairs, in the order they were evaluated.
+        reference: Worst value for each objective. Defaults to the worst
+            value of each objective among all the records.
+
+    Returns:
+        Array with the hypervolume of the frontier after each record.
+    """
+    values = loss_array([loss for _, loss in records])
+    trace = np.zeros(len(values))
+    if len(values) == 0:
+        return trace
+    if reference is None:
+        reference = values.max(axis=0)
+
+    frontier = loss_function.ParetoFrontier()
+    volume = 0.
+    for i, row in enumerate(values):
+        inserted = frontier.inserted
+        frontier.update(i, row)
+        # The frontier only changes when the record gets in
+        if frontier.inserted != inserted:
+            volume = hypervolume(frontier.values, reference)
+        trace[i] = volume
+    return trace
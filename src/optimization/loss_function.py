@@ -1,4 +1,114 @@
 """Module for loss functions."""
+from typing import Hashable
+from typing import Mapping
+
+import numpy as np
+
+# Number of losses checked at once when filtering many of them, bounding the
+# memory used to (chunk, front size, objectives).
+DOMINANCE_CHUNK_SIZE = 256
+
+
+def nondominated_mask(values: np.ndarray) -> np.ndarray:
+    """Get which losses are not dominated by any other one.
+
+    Equal losses do not dominate each other, so they are all kept.
+
+    Args:
+        values: Array of shape (n, objectives) with the losses.
+
+    Returns:
+        Boolean array of shape (n,), True for the non-dominated losses.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n, objectives = values.shape
+    if n == 0:
+        return np.ones(0, dtype=bool)
+    if objectives == 1:
+        return values[:, 0] == values[:, 0].min()
+    if objectives == 2:
+        return nondominated_mask_2d(values)
+
+    # A loss can only be dominated by the ones before it in lexicographic
+    # order, so each chunk is checked against the front found so far and
+    # against itself.
+    order = np.lexsort(values.T[::-1])
+    sorted_values = values[order]
+    front = np.zeros((0, objectives))
+    sorted_mask = np.empty(n, dtype=bool)
+    for start in range(0, n, DOMINANCE_CHUNK_SIZE):
+        chunk = sorted_values[start:start + DOMINANCE_CHUNK_SIZE]
+        keep = ~(dominated_by(chunk, front) | dominated_by(chunk, chunk))
+        sorted_mask[start:start + DOMINANCE_CHUNK_SIZE] = keep
+        front = np.concatenate([front, chunk[keep]])
+    mask = np.empty(n, dtype=bool)
+    mask[order] = sorted_mask
+    return mask
+
+
+def nondominated_mask_2d(values: np.ndarray) -> np.ndarray:
+    """Get which losses are not dominated, for two objectives.
+
+    Sweep in lexicographic order: a loss is dominated iff some loss strictly
+    before its group of equal losses has a lower or equal second objective.
+
+    Args:
+        values: Non-empty array of shape (n, 2) with the losses.
+
+    Returns:
+        Boolean array of shape (n,), True for the non-dominated losses.
+    """
+    n = len(values)
+    order = np.lexsort((values[:, 1], values[:, 0]))
+    first, second = values[order, 0], values[order, 1]
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1])
+    group_start = np.maximum.accumulate(
+        np.where(new_group, np.arange(n), 0))
+    best_before = np.empty(n)
+    best_before[0] = np.inf
+    best_before[1:] = np.minimum.accumulate(second)[:-1]
+    mask = np.empty(n, dtype=bool)
+    mask[order] = best_before[group_start] > second
+    return mask
+
+
+def point_key(point) -> Hashable:
+    """Get a hashable key identifying a point, for fast duplicate checks.
+
+    Hashable points are their own key. Mappings (e.g. policy kwargs) and
+    sequences are keyed by their items, and anything else by its repr.
+    """
+    try:
+        hash(point)
+        return point
+    except TypeError:
+        pass
+    if isinstance(point, Mapping):
+        try:
+            return (dict, tuple(sorted(
+                (key, point_key(value)) for key, value in point.items())))
+        except TypeError:
+            pass  # Keys that can't be sorted
+    elif isinstance(point, (list, tuple)):
+        return (list, tuple(point_key(value) for value in point))
+    return (repr, repr(point))
+
+
+def dominated_by(values: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Get which losses are dominated by any of the others.
+
+    Args:
+        values: Array of shape (n, objectives) with the losses to check.
+        others: Array of shape (m, objectives) with the losses to check
+            against.
+
+    Returns:
+        Boolean array of shape (n,).
+    """
+    values = values[:, None, :]
+    return (np.all(others <= values, axis=2) &
+            np.any(others < values, axis=2)).any(axis=1)
 
 
 class LossFunction():
@@ -14,10 +124,31 @@ class LossFunction():
 
 
 class ParetoFrontier():
-    """Class to store the pareto frontier for a problem."""
+    """Class to store the pareto frontier for a problem.
+
+    Losses are kept in a float array alongside the points, so that dominance
+    is checked against the whole frontier at once. With two objectives the
+    array is kept sorted, so a new point is checked with a binary search.
+    """
 
     def __init__(self):
-        self.frontier = []
+        self.points = []
+        self.losses = []
+        self.values = None
+        # Insertion number of each point, to return them in insertion order
+        self.sequence = np.zeros(0, dtype=np.int64)
+        self.inserted = 0
+        # Keys of the points in the frontier, for fast duplicate checks
+        self.keys = set()
+
+    @property
+    def frontier(self):
+        """Get the (point, loss) pairs in the frontier, in insertion order."""
+        return [(self.points[i], self.losses[i])
+                for i in np.argsort(self.sequence, kind='stable')]
+
+    def __len__(self):
+        return len(self.points)
 
     def update(self, point, loss):
         """Update the pareto frontier given a new point and loss value.
@@ -25,17 +156,143 @@ class ParetoFrontier():
         The frontier will remain unchanged if any point dominates the new given
         point. If the new point in turn, dominates any points previously in the
         frontier, these points will be removed."""
-        for pareto_point, pareto_loss in self.frontier:
-            if pareto_point == point:
-                return  # No update - new point already exists.
-            if ParetoFrontier.dominate(pareto_loss, loss):
-                return  # No update - new loss is worse than some point
+        row = self.loss_values([loss])[0]
+        if self.contains(point):
+            return  # No update - new point already exists.
+
+        if len(row) == 2:
+            self._update_sorted(point, loss, row)
+            return
+
+        values = self.values
+        if np.any(np.all(values <= row, axis=1) & np.any(values < row, axis=1)):
+            return  # No update - new loss is worse than some point
 
         # Update - keep only points that are not dominated by the new point
-        self.frontier = [(pareto_point, pareto_loss)
-                         for pareto_point, pareto_loss in self.frontier
-                         if not ParetoFrontier.dominate(loss, pareto_loss)]
-        self.frontier.append((point, loss))
+        keep = ~(np.all(row <= values, axis=1) & np.any(row < values, axis=1))
+        if not keep.all():
+            self._keep(keep)
+        self._insert(len(self.points), point, loss, row)
+
+    def update_many(self, points, losses):
+        """Update the pareto frontier with many new points at once.
+
+        Points already in the frontier are skipped, as with update. A point
+        repeated within the batch keeps its first loss that is not dominated,
+        so a later loss dominating an earlier one replaces it.
+
+        Args:
+            points: The new points.
+            losses: The loss value for each of the new points.
+        """
+        points = list(points)
+        losses = list(losses)
+        if len(points) != len(losses):
+            raise ValueError('Got %d points but %d losses' % (
+                len(points), len(losses)))
+        rows = self.loss_values(losses)
+        keys = [point_key(point) for point in points]
+        new = [i for i, key in enumerate(keys) if key not in self.keys]
+        if not new:
+            return
+
+        all_points = self.points + [points[i] for i in new]
+        all_keys = [point_key(point) for point in self.points] + [
+            keys[i] for i in new]
+        all_values = np.concatenate([self.values, rows[new]])
+        all_sequence = np.concatenate([
+            self.sequence,
+            self.inserted + np.arange(len(new), dtype=np.int64)])
+        self.inserted += len(new)
+
+        # Duplicates are dropped after the dominance filter, so that the one
+        # kept is not dominated
+        keep = self.first_occurrences(
+            all_keys, np.flatnonzero(nondominated_mask(all_values)))
+        if all_values.shape[1] == 2:
+            keep = keep[np.lexsort((all_sequence[keep],
+                                    all_values[keep, 1],
+                                    all_values[keep, 0]))]
+        all_losses = self.losses + [losses[i] for i in new]
+        self.points = [all_points[i] for i in keep]
+        self.losses = [all_losses[i] for i in keep]
+        self.values = all_values[keep]
+        self.sequence = all_sequence[keep]
+        self.keys = {all_keys[i] for i in keep}
+
+    @classmethod
+    def first_occurrences(cls, keys, indices) -> np.ndarray:
+        """Get the indices of the first occurrence of each distinct key."""
+        seen = set()
+        first = []
+        for i in indices:
+            if keys[i] not in seen:
+                seen.add(keys[i])
+                first.append(i)
+        return np.asarray(first, dtype=np.int64)
+
+    def loss_values(self, losses) -> np.ndarray:
+        """Convert losses to an array of shape (len(losses), objectives)."""
+        rows = np.array([np.ravel(np.asarray(loss, dtype=np.float64))
+                         for loss in losses])
+        if self.values is None:
+            if rows.ndim != 2:
+                raise ValueError('Losses have different length')
+            self.values = np.zeros((0, rows.shape[1]))
+        if rows.ndim != 2 or rows.shape[1] != self.values.shape[1]:
+            raise ValueError('Losses have different length')
+        return rows
+
+    def contains(self, point) -> bool:
+        """Check whether the given point is in the frontier."""
+        return point_key(point) in self.keys
+
+    def _add_key(self, point):
+        self.keys.add(point_key(point))
+
+    def _update_sorted(self, point, loss, row):
+        """Update a two objective frontier, sorted by first then second loss.
+
+        In such a frontier the first loss is non-decreasing and the second
+        non-increasing, so the dominating and dominated points can be found
+        by binary search.
+        """
+        first, second = self.values[:, 0], self.values[:, 1]
+        # The best second loss among points with a lower or equal first one
+        below = np.searchsorted(first, row[0], side='right')
+        if (below > 0 and second[below - 1] <= row[1] and
+                (first[below - 1] < row[0] or second[below - 1] < row[1])):
+            return  # No update - new loss is worse than some point
+
+        # Points with a higher or equal first loss and second loss
+        start = np.searchsorted(first, row[0], side='left')
+        stop = start + np.searchsorted(-second[start:], -row[1], side='right')
+        # If the frontier has the same loss, those are the only points there
+        same = ((first[start:stop] == row[0]) &
+                (second[start:stop] == row[1]))
+        if stop > start and not same.any():
+            keep = np.ones(len(self.points), dtype=bool)
+            keep[start:stop] = False
+            self._keep(keep)
+            stop = start
+        # Equal losses stay in insertion order
+        self._insert(stop, point, loss, row)
+
+    def _keep(self, keep):
+        for i in np.flatnonzero(~keep):
+            self.keys.discard(point_key(self.points[i]))
+        self.points = [p for p, k in zip(self.points, keep) if k]
+        self.losses = [loss for loss, k in zip(self.losses, keep) if k]
+        self.values = self.values[keep]
+        self.sequence = self.sequence[keep]
+
+    def _insert(self, position, point, loss, row):
+        self.points.insert(position, point)
+        self.losses.insert(position, loss)
+        self.values = np.insert(self.values, position, row, axis=0)
+        self.sequence = np.insert(self.sequence, position, self.inserted)
+        self.inserted += 1
+        self._add_key(point)
 
     @classmethod
     def dominate(cls, loss_a, loss_b):
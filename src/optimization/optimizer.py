@@ -1,31 +1,104 @@
 """Module for handling the optimization loop."""
-import itertools
+import collections
+from concurrent import futures
+import functools
+import operator
+import os
 import random
+from typing import Optional
 
+import attr
+import numpy as np
+from sklearn import neighbors
+
+from help_project.src.optimization import analysis
 from help_project.src.optimization import loss_function
 from help_project.src.optimization import lockdown_config
 
+EXECUTORS = {
+    'thread': futures.ThreadPoolExecutor,
+    'process': futures.ProcessPoolExecutor,
+}
+
+# Models used by each worker process, sent once when the worker starts.
+_WORKER_MODELS = None
+
+
+def init_worker(health_model, economic_model, loss):
+    """Store the models for the current worker process."""
+    global _WORKER_MODELS  # pylint: disable=global-statement
+    _WORKER_MODELS = (health_model, economic_model, loss)
+
+
+def evaluate_policy(policy, models=None):
+    """Compute the loss of a policy.
+
+    Args:
+        policy: The policy to evaluate.
+        models: The (health model, economic model, loss) to use. Defaults to
+            the ones of the worker process.
+
+    Returns:
+        The loss for the policy.
+    """
+    health_model, economic_model, loss = models or _WORKER_MODELS
+    health_output = health_model.run(policy)
+    economic_output = economic_model.get_economic_vector(policy)
+    return loss(health_output, economic_output)
+
+
+@attr.s(frozen=True)
+class EvaluationConfig:  # pylint: disable=too-few-public-methods
+    """How an optimizer evaluates its proposals.
+
+    Attributes:
+        executor: None evaluates proposals one after the other, 'thread' or
+            'process' evaluates them concurrently on a pool of that kind.
+        workers: Size of the pool. Defaults to the number of CPUs.
+        batch_size: Number of proposals being evaluated at any time.
+            Defaults to the number of workers.
+        ordered: Whether results are fed back in the order the proposals
+            were made, which keeps runs deterministic. Otherwise they are
+            fed back as soon as they complete.
+    """
+    executor: Optional[str] = attr.ib(
+        default=None, validator=attr.validators.optional(
+            attr.validators.in_(EXECUTORS)))
+    workers: int = attr.ib(factory=lambda: os.cpu_count() or 1)
+    batch_size: Optional[int] = attr.ib(default=None)
+    ordered: bool = attr.ib(default=True)
+
 
 class Optimizer():
     """Main optimization class."""
 
-    def __init__(self, config, loss):
+    def __init__(self, config, loss, evaluation=None):
+        """Initialize the optimizer.
+
+        Args:
+            config: The LockdownConfig to get proposals from.
+            loss: The loss function to minimize.
+            evaluation: The EvaluationConfig for the proposals. Defaults to
+                evaluating them one after the other.
+        """
         self.config = config
         self.loss = loss
+        self.evaluation = evaluation or EvaluationConfig()
 
     def optimize(self, health_model, economic_model, n_steps=None):
         """Run the optimization loop."""
+        if self.evaluation.executor is not None:
+            return self.optimize_concurrently(
+                health_model, economic_model, n_steps)
+
         pareto_frontier = loss_function.ParetoFrontier()
+        models = (health_model, economic_model, self.loss)
 
         step = 0
         while True:
             try:
                 policy = self.propose()
-
-                health_output = health_model.run(policy)
-                economic_output = economic_model.get_economic_vector(policy)
-
-                loss = self.loss(health_output, economic_output)
+                loss = evaluate_policy(policy, models)
                 self.record(policy, loss)
 
                 pareto_frontier.update(policy, loss)
@@ -37,6 +110,64 @@ class Optimizer():
 
         return pareto_frontier.frontier
 
+    def optimize_concurrently(self, health_model, economic_model, n_steps=None):
+        """Run the optimization loop evaluating proposals on a pool.
+
+        Up to batch_size proposals are in flight, and a new one is made each
+        time a result is fed back, so the pool is kept busy throughout. With
+        a thread pool all the workers share the models, so their state must
+        be safe to use from several threads.
+        """
+        pareto_frontier = loss_function.ParetoFrontier()
+        models = (health_model, economic_model, self.loss)
+        evaluation = self.evaluation
+        batch_size = evaluation.batch_size or evaluation.workers
+        if evaluation.executor == 'process':
+            # Send the models to each worker once rather than with every task
+            pool = EXECUTORS[evaluation.executor](
+                max_workers=evaluation.workers,
+                initializer=init_worker,
+                initargs=models)
+            models = None
+        else:
+            pool = EXECUTORS[evaluation.executor](
+                max_workers=evaluation.workers)
+
+        with pool:
+            pending = collections.deque()
+            proposed = 0
+            exhausted = False
+            while True:
+                while (not exhausted and
+                       len(pending) < batch_size and
+                       (n_steps is None or proposed < n_steps) and
+                       (not pending or self.can_propose())):
+                    try:
+                        policy = self.propose()
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append(
+                        (policy, pool.submit(evaluate_policy, policy, models)))
+                    proposed += 1
+                if not pending:
+                    break
+
+                if evaluation.ordered:
+                    policy, future = pending.popleft()
+                else:
+                    futures.wait([future for _, future in pending],
+                                 return_when=futures.FIRST_COMPLETED)
+                    policy, future = next(
+                        item for item in pending if item[1].done())
+                    pending.remove((policy, future))
+
+                loss = future.result()
+                self.record(policy, loss)
+                pareto_frontier.update(policy, loss)
+
+        return pareto_frontier.frontier
+
     def propose(self):
         """Get a new policy proposal from the config."""
         raise NotImplementedError()
@@ -45,6 +176,10 @@ class Optimizer():
         """Record the loss for the given proposal."""
         raise NotImplementedError()
 
+    def can_propose(self):
+        """Whether a proposal can be made while others are being evaluated."""
+        return True
+
 
 class RandomSearch(Optimizer):
     """Optimizer that tries possibilities randomly."""
@@ -60,13 +195,207 @@ class RandomSearch(Optimizer):
         return
 
 
+def optimize_shard(config, loss, models, shard, records_path=None):
+    """Run an exhaustive search over a single shard of the options grid.
+
+    Args:
+        config: The LockdownConfig to enumerate.
+        loss: The loss function to minimize.
+        models: The (health model, economic model) to evaluate proposals
+            with.
+        shard: The (shard index, number of shards) to enumerate.
+        records_path: Prefix of the files to spill the records to, if any.
+
+    Returns:
+        The pareto frontier of the shard.
+    """
+    search = ExhaustiveSearch(
+        config, loss, streaming=True, shard=shard, records_path=records_path)
+    return search.optimize(*models)
+
+
+def get_argument(proposal, name):
+    """Get the value of an argument of a proposal."""
+    try:
+        return proposal[name]
+    except TypeError:
+        return getattr(proposal, name)
+
+
+class OptionsGrid():
+    """Grid of the combinations of Options of a LockdownConfig.
+
+    Each combination is identified by its index in the grid, in the order of
+    itertools.product.
+    """
+
+    def __init__(self, config):
+        """Split the arguments of the config by kind.
+
+        Args:
+            config: The LockdownConfig to enumerate.
+        """
+        self.fixed = {}
+        self.option_names = []
+        self.option_values = []
+        self.range_args = []
+        for name, values in config.kwargs.items():
+            if isinstance(values, lockdown_config.Options):
+                self.option_names.append(name)
+                self.option_values.append(list(values.values))
+            elif isinstance(values, lockdown_config.Range):
+                self.range_args.append((name, values))
+            else:
+                self.fixed[name] = values
+
+    @property
+    def size(self):
+        """Number of combinations of Options in the grid."""
+        return functools.reduce(
+            operator.mul, (len(values) for values in self.option_values), 1)
+
+    @property
+    def range_names(self):
+        """Names of the Range arguments."""
+        return [name for name, _ in self.range_args]
+
+    def decode(self, index):
+        """Get the kwargs for the options at the given grid index."""
+        kwargs = dict(self.fixed)
+        chosen = []
+        for values in reversed(self.option_values):
+            index, position = divmod(index, len(values))
+            chosen.append(values[position])
+        kwargs.update(zip(self.option_names, reversed(chosen)))
+        return kwargs
+
+    def encode(self, proposal):
+        """Get the grid index of the options of a proposal."""
+        index = 0
+        for name, values in zip(self.option_names, self.option_values):
+            index = index * len(values) + values.index(
+                get_argument(proposal, name))
+        return index
+
+    def sample(self, index):
+        """Get the kwargs at the given grid index, with random ranges."""
+        kwargs = self.decode(index)
+        for range_name, range_arg in self.range_args:
+            kwargs[range_name] = random.uniform(range_arg.min, range_arg.max)
+        return kwargs
+
+
+class RecordArrays():
+    """Losses and Range values recorded in arrays with one row per index.
+
+    The arrays are empty until the first record, when the number of
+    objectives becomes known.
+    """
+
+    def __init__(self, rows, range_count, path=None):
+        """Initialize the empty arrays.
+
+        Args:
+            rows: Number of rows to allocate.
+            range_count: Number of Range values recorded in each row.
+            path: Prefix of the .npy files to memory-map the arrays to, if
+                any.
+        """
+        self.path = path
+        self.losses = np.zeros((0, 0))
+        self.range_values = np.zeros((0, range_count))
+        self.recorded = np.zeros(0, dtype=bool)
+        self.scalar_loss = False
+        self.rows = rows
+
+    def record(self, row, loss, range_values):
+        """Store the loss and Range values of the given row."""
+        values = np.ravel(np.asarray(loss, dtype=np.float64))
+        if not self.recorded.size:
+            self.scalar_loss = np.ndim(loss) == 0
+            self.allocate(len(values))
+        self.losses[row] = values
+        self.range_values[row] = range_values
+        self.recorded[row] = True
+
+    def allocate(self, objectives):
+        """Allocate the arrays for the given number of objectives."""
+        self.losses = self.make_array(
+            'losses', (self.rows, objectives), np.float64)
+        self.range_values = self.make_array(
+            'range_values', (self.rows,) + self.range_values.shape[1:],
+            np.float64)
+        self.recorded = self.make_array('recorded', (self.rows,), bool)
+
+    def make_array(self, name, shape, dtype):
+        """Make a zeroed array, memory-mapped if there is a path."""
+        if self.path is None:
+            return np.zeros(shape, dtype=dtype)
+        return np.lib.format.open_memmap(
+            '%s.%s.npy' % (self.path, name),
+            mode='w+', dtype=dtype, shape=shape)
+
+    def iter_rows(self, chunk_size):
+        """Iterate over the (row, range values, loss) recorded so far."""
+        for chunk_start in range(0, len(self.recorded), chunk_size):
+            rows = chunk_start + np.flatnonzero(
+                self.recorded[chunk_start:chunk_start + chunk_size])
+            for row in rows:
+                loss = self.losses[row].tolist()
+                yield (row, self.range_values[row].tolist(),
+                       loss[0] if self.scalar_loss else tuple(loss))
+
+
 class ExhaustiveSearch(Optimizer):
-    """Optimizer that tries all possibilities."""
+    """Optimizer that tries all possibilities.
 
-    def __init__(self, config, loss):
-        super().__init__(config, loss)
-        self.proposals = self.generate_proposals()
+    Each combination of Options is identified by its index in the grid, in
+    the order of itertools.product. In streaming mode the losses are kept in
+    arrays indexed by it instead of a list of records, optionally spilled to
+    disk, and the search can be restricted to a shard of the indices.
+    """
+
+    def __init__(self, config, loss, streaming=False, shard=None,
+                 records_path=None, **kwargs):
+        """Initialize the optimizer.
+
+        Args:
+            config: The LockdownConfig to enumerate.
+            loss: The loss function to minimize.
+            streaming: Whether to record the losses in arrays rather than
+                keeping all the records. The records list then stays empty,
+                use iter_records to read them.
+            shard: The (shard index, number of shards) to restrict the search
+                to, if any. Shards are contiguous ranges of grid indices.
+            records_path: Prefix of the .npy files to memory-map the recorded
+                arrays to. Implies streaming.
+            **kwargs: Arguments for the Optimizer base class.
+        """
+        super().__init__(config, loss, **kwargs)
+        self.grid = OptionsGrid(config)
+        self.start, self.stop = self.shard_range(self.grid.size, shard)
         self.records = []
+        self.arrays = None
+        if streaming or records_path is not None:
+            self.arrays = RecordArrays(
+                self.stop - self.start, len(self.grid.range_args),
+                records_path)
+        self.proposals = self.generate_proposals()
+
+    @property
+    def streaming(self):
+        """Whether the losses are recorded in arrays."""
+        return self.arrays is not None
+
+    @classmethod
+    def shard_range(cls, size, shard=None):
+        """Get the [start, stop) range of grid indices in a shard."""
+        if shard is None:
+            return 0, size
+        index, count = shard
+        if not 0 <= index < count:
+            raise ValueError('Invalid shard %d of %d' % (index, count))
+        return size * index // count, size * (index + 1) // count
 
     def propose(self):
         """Get a new proposal."""
@@ -75,30 +404,432 @@ class ExhaustiveSearch(Optimizer):
 
     def record(self, proposal, loss):
         """Store result for the given proposal for possible later use."""
-        self.records.append((proposal, loss))
+        if not self.streaming:
+            self.records.append((proposal, loss))
+            return
+        self.arrays.record(
+            self.encode(proposal) - self.start, loss,
+            [get_argument(proposal, name) for name in self.grid.range_names])
+
+    def iter_records(self, chunk_size=2 ** 16):
+        """Iterate over the (proposal kwargs, loss) pairs recorded so far.
+
+        Args:
+            chunk_size: Number of rows of the recorded arrays read at once.
+        """
+        if not self.streaming:
+            yield from self.records
+            return
+        for row, range_values, loss in self.arrays.iter_rows(chunk_size):
+            kwargs = self.decode(self.start + row)
+            kwargs.update(zip(self.grid.range_names, range_values))
+            yield kwargs, loss
+
+    def decode(self, index):
+        """Get the kwargs for the options at the given grid index."""
+        return self.grid.decode(index)
+
+    def encode(self, proposal):
+        """Get the grid index of the options of a proposal."""
+        return self.grid.encode(proposal)
 
     def generate_proposals(self):
         """Generator for proposals."""
-        range_args = []
-        option_args = []
+        for index in range(self.start, self.stop):
+            yield self.grid.sample(index)
 
-        sample_kwargs = {}
-        for name, values in self.config.kwargs.items():
-            if isinstance(values, lockdown_config.Options):
-                option_args.append((name, values.values))
-            elif isinstance(values, lockdown_config.Range):
-                range_args.append((name, values))
+    def optimize_sharded(self, health_model, economic_model, shards,
+                         workers=None):
+        """Run the search over shards of the grid on a process pool.
+
+        The search is split into shards that are enumerated in streaming mode
+        by separate processes, and their frontiers are then merged.
+
+        Args:
+            health_model: The health model to evaluate proposals with.
+            economic_model: The economic model to evaluate proposals with.
+            shards: Number of shards to split the grid into.
+            workers: Number of worker processes. Defaults to the CPU count.
+
+        Returns:
+            The pareto frontier over the whole grid.
+        """
+        records_path = self.arrays.path if self.streaming else None
+        with futures.ProcessPoolExecutor(
+                max_workers=workers or self.evaluation.workers) as pool:
+            pending = [
+                pool.submit(optimize_shard, self.config, self.loss,
+                            (health_model, economic_model), (shard, shards),
+                            None if records_path is None
+                            else '%s-%d' % (records_path, shard))
+                for shard in range(shards)
+            ]
+            pareto_frontier = loss_function.ParetoFrontier()
+            for future in pending:
+                frontier = future.result()
+                if frontier:
+                    pareto_frontier.update_many(*zip(*frontier))
+        return pareto_frontier.frontier
+
+
+@attr.s(frozen=True)
+class EvolutionConfig:  # pylint: disable=too-few-public-methods
+    """Hyperparameters of an EvolutionarySearch.
+
+    Attributes:
+        population_size: Number of proposals in each generation.
+        generations: Maximum number of generations, if any.
+        mutation_rate: Probability of mutating each argument of a new
+            proposal. Defaults to one over the number of arguments.
+        max_attempts: Number of attempts per proposal at breeding one that
+            was not evaluated before. The search stops once a generation
+            only has evaluated ones.
+        seed: Seed for the random number generator.
+    """
+    population_size: int = attr.ib(default=20)
+    generations: Optional[int] = attr.ib(default=None)
+    mutation_rate: Optional[float] = attr.ib(default=None)
+    max_attempts: int = attr.ib(default=10)
+    seed: Optional[int] = attr.ib(default=None)
+
+
+class Genome():
+    """The arguments of a LockdownConfig that are evolved.
+
+    Options and Range arguments are genes, the rest are kept fixed.
+    """
+
+    def __init__(self, config):
+        """Split the arguments of the config.
+
+        Args:
+            config: The LockdownConfig to get the arguments from.
+        """
+        self.fixed = {}
+        self.names = []
+        self.domains = []
+        for name, values in config.kwargs.items():
+            if isinstance(values, (lockdown_config.Options,
+                                   lockdown_config.Range)):
+                self.names.append(name)
+                self.domains.append(values)
+            else:
+                self.fixed[name] = values
+
+    def kwargs(self, genes):
+        """Get the policy kwargs for the given genes."""
+        kwargs = dict(self.fixed)
+        kwargs.update(zip(self.names, genes))
+        return kwargs
+
+    def sample(self, rng):
+        """Get random genes."""
+        return tuple(
+            rng.choice(domain.values)
+            if isinstance(domain, lockdown_config.Options)
+            else rng.uniform(domain.min, domain.max)
+            for domain in self.domains)
+
+
+@attr.s(frozen=True)
+class Parents:  # pylint: disable=too-few-public-methods
+    """Parents selected for breeding, with their rank and crowding distance.
+
+    Attributes:
+        members: The (genes, loss) of the parents.
+        ranks: The non-dominated rank of each parent.
+        crowding: The crowding distance of each parent.
+    """
+    members: list = attr.ib(factory=list)
+    ranks: np.ndarray = attr.ib(factory=lambda: np.zeros(0, dtype=np.int64),
+                                eq=False)
+    crowding: np.ndarray = attr.ib(factory=lambda: np.zeros(0), eq=False)
+
+
+class Brood():
+    """Bookkeeping of the generations of an EvolutionarySearch."""
+
+    def __init__(self):
+        self.generation = 0
+        self.queue = collections.deque()  # genes left to propose
+        self.in_flight = []  # (proposal, genes) not yet recorded
+        self.offspring = []  # (genes, loss) evaluated this generation
+        self.seen = set()  # genes of every generation
+
+    def add(self, children):
+        """Start a new generation with the given children to propose."""
+        self.seen.update(children)
+        self.queue.extend(children)
+        self.generation += 1
+
+    def land(self, proposal, loss):
+        """Move a proposal from in flight to the evaluated offspring.
+
+        Returns:
+            The genes of the proposal.
+        """
+        index = next(i for i, (in_flight, _) in enumerate(self.in_flight)
+                     if in_flight is proposal)
+        _, genes = self.in_flight.pop(index)
+        self.offspring.append((genes, loss))
+        return genes
+
+
+class EvolutionarySearch(Optimizer):
+    """Multi-objective genetic algorithm, along the lines of NSGA-II.
+
+    Each generation of proposals is bred from the best ones so far, ranked
+    by non-dominated sorting and then by crowding distance so the frontier
+    stays spread out. A generation is proposed as a whole before being
+    recorded, so it can be evaluated concurrently in a single batch.
+    """
+
+    def __init__(self, config, loss, evolution=None, **kwargs):
+        """Initialize the optimizer.
+
+        Args:
+            config: The LockdownConfig to get proposals from. Its Options and
+                Range arguments are evolved, the rest are kept fixed.
+            loss: The loss function to minimize.
+            evolution: The EvolutionConfig with the hyperparameters.
+            **kwargs: Arguments for the Optimizer base class.
+        """
+        self.evolution = evolution or EvolutionConfig()
+        evaluation = kwargs.pop('evaluation', None) or EvaluationConfig()
+        if evaluation.batch_size is None:
+            # Evaluate a whole generation at once
+            evaluation = attr.evolve(
+                evaluation, batch_size=self.evolution.population_size)
+        super().__init__(config, loss, evaluation=evaluation, **kwargs)
+        self.random = random.Random(self.evolution.seed)
+        self.genome = Genome(config)
+        self.records = []
+        self.parents = Parents()
+        self.brood = Brood()
+
+    @property
+    def generation(self):
+        """Number of generations proposed so far."""
+        return self.brood.generation
+
+    @property
+    def mutation_rate(self):
+        """Probability of mutating each argument of a new proposal."""
+        if self.evolution.mutation_rate is not None:
+            return self.evolution.mutation_rate
+        return 1 / max(len(self.genome.names), 1)
+
+    def propose(self):
+        """Get a new proposal, breeding a new generation when needed."""
+        if not self.brood.queue:
+            self.next_generation()
+        genes = self.brood.queue.popleft()
+        proposal = lockdown_config.LockdownConfig.generate_lockdown_policy(
+            self.genome.kwargs(genes))
+        self.brood.in_flight.append((proposal, genes))
+        return proposal
+
+    def can_propose(self):
+        """Only the current generation can be proposed before it is recorded."""
+        return bool(self.brood.queue)
+
+    def record(self, proposal, loss):
+        """Store result for the given proposal for breeding."""
+        self.records.append((proposal, loss))
+        self.brood.land(proposal, loss)
+
+    def next_generation(self):
+        """Select the parents and breed the next generation to propose."""
+        generations = self.evolution.generations
+        if generations is not None and self.generation >= generations:
+            raise StopIteration()
+
+        if self.generation == 0:
+            children = self.breed(
+                self.sample, self.evolution.population_size)
+        else:
+            self.select(self.parents.members + self.brood.offspring)
+            self.brood.offspring = []
+            children = self.make_offspring()
+        if not children:
+            raise StopIteration()
+        self.brood.add(children)
+
+    @classmethod
+    def rank(cls, losses):
+        """Rank losses by non-dominated sorting, then crowding distance.
+
+        Returns:
+            The indices of the losses from best to worst, along with the
+            non-dominated rank and crowding distance of each loss.
+        """
+        ranks = analysis.nondominated_sort(losses)
+        crowding = np.zeros(len(losses))
+        for rank in np.unique(ranks):
+            front = np.flatnonzero(ranks == rank)
+            crowding[front] = analysis.crowding_distance(
+                [losses[i] for i in front])
+        return np.lexsort((-crowding, ranks)), ranks, crowding
+
+    def select(self, candidates):
+        """Keep the best candidates as the parents for the next generation."""
+        order, ranks, crowding = self.rank([loss for _, loss in candidates])
+        selected = order[:self.evolution.population_size]
+        self.parents = Parents(
+            members=[candidates[i] for i in selected],
+            ranks=ranks[selected],
+            crowding=crowding[selected])
+
+    def make_offspring(self):
+        """Get the genes of the next generation from the selected parents."""
+        return self.breed(self.mate, self.evolution.population_size)
+
+    def breed(self, make_child, count):
+        """Make up to count distinct children that were not seen before."""
+        children = []
+        new = set()
+        for _ in range(count * self.evolution.max_attempts):
+            if len(children) == count:
+                break
+            child = make_child()
+            if child not in self.brood.seen and child not in new:
+                new.add(child)
+                children.append(child)
+        return children
+
+    def sample(self):
+        """Get random genes."""
+        return self.genome.sample(self.random)
+
+    def tournament(self):
+        """Pick the better of two random parents."""
+        ranks, crowding = self.parents.ranks, self.parents.crowding
+        first, second = (self.random.randrange(len(self.parents.members))
+                         for _ in range(2))
+        if (ranks[second], -crowding[second]) < (
+                ranks[first], -crowding[first]):
+            first = second
+        return self.parents.members[first][0]
+
+    def mate(self):
+        """Get the genes of a child of two parents, with mutations."""
+        mother, father = self.tournament(), self.tournament()
+        mutation_rate = self.mutation_rate
+        genes = []
+        for domain, mother_gene, father_gene in zip(
+                self.genome.domains, mother, father):
+            if isinstance(domain, lockdown_config.Options):
+                gene = self.random.choice((mother_gene, father_gene))
+                if self.random.random() < mutation_rate:
+                    gene = self.random.choice(domain.values)
+            else:
+                weight = self.random.random()
+                gene = weight * mother_gene + (1 - weight) * father_gene
+                if self.random.random() < mutation_rate:
+                    gene += self.random.gauss(
+                        0, (domain.max - domain.min) / 10)
+                gene = min(max(gene, domain.min), domain.max)
+            genes.append(gene)
+        return tuple(genes)
+
+
+class SurrogateSearch(EvolutionarySearch):
+    """Evolutionary search screening its offspring with a surrogate model.
+
+    A cheap regressor is trained to predict the loss from the policy
+    arguments of every evaluated proposal. Each generation, many more
+    children are bred than proposed, and only the ones the regressor
+    predicts to be best are actually evaluated.
+    """
+
+    def __init__(self, config, loss, screening_factor=10,
+                 regressor_factory=None, **kwargs):
+        """Initialize the optimizer.
+
+        Args:
+            config: The LockdownConfig to get proposals from. Its Options and
+                Range arguments are evolved, the rest are kept fixed.
+            loss: The loss function to minimize.
+            screening_factor: Number of children bred and screened for each
+                one that is proposed.
+            regressor_factory: Callable returning a new multi-output sklearn
+                style regressor. Defaults to distance weighted KNN, with no
+                more neighbors than evaluated proposals.
+            **kwargs: Arguments for the EvolutionarySearch base class.
+        """
+        super().__init__(config, loss, **kwargs)
+        self.screening_factor = screening_factor
+        self.regressor_factory = regressor_factory or self.make_regressor
+        self.regressor = None
+        self.evaluated = []  # (genes, loss) of every recorded proposal
+        self.predictions = {}  # genes -> predicted loss, not yet recorded
+        self.errors = []  # absolute errors of the current generation
+        # Mean absolute error of the predictions for each screened generation
+        self.surrogate_errors = []
+
+    @property
+    def surrogate_error(self):
+        """Mean absolute error per objective for the last screened generation."""
+        return self.surrogate_errors[-1] if self.surrogate_errors else None
+
+    def make_regressor(self, n_neighbors=5):
+        """Get a distance weighted KNN fitting the evaluated proposals."""
+        return neighbors.KNeighborsRegressor(
+            n_neighbors=max(min(n_neighbors, len(self.evaluated)), 1),
+            weights='distance')
+
+    def record(self, proposal, loss):
+        """Store result for the given proposal and check its prediction."""
+        super().record(proposal, loss)
+        genes = self.brood.offspring[-1][0]
+        self.evaluated.append((genes, loss))
+        if genes in self.predictions:
+            self.errors.append(np.abs(
+                self.predictions.pop(genes) -
+                np.ravel(np.asarray(loss, dtype=np.float64))))
+            if not self.predictions:
+                # The whole screened generation has been evaluated
+                self.surrogate_errors.append(np.mean(self.errors, axis=0))
+                self.errors = []
+
+    def make_offspring(self):
+        """Breed many children and keep the ones predicted to be best."""
+        population_size = self.evolution.population_size
+        candidates = self.breed(
+            self.mate, population_size * self.screening_factor)
+        if len(candidates) <= population_size:
+            return candidates
+
+        self.regressor = self.regressor_factory()
+        self.regressor.fit(
+            self.encode([genes for genes, _ in self.evaluated]),
+            analysis.loss_array([loss for _, loss in self.evaluated]))
+        predicted = self.regressor.predict(self.encode(candidates))
+        predicted = np.reshape(predicted, (len(candidates), -1))
+
+        order, _, _ = self.rank(list(predicted))
+        children = [candidates[i] for i in order[:population_size]]
+        self.predictions = {
+            candidates[i]: predicted[i] for i in order[:population_size]}
+        return children
+
+    def encode(self, genes_list):
+        """Encode genes as features scaled to [0, 1].
+
+        Numeric options and ranges are scaled by their bounds, other options
+        by their position.
+        """
+        columns = []
+        for i, domain in enumerate(self.genome.domains):
+            values = [genes[i] for genes in genes_list]
+            if isinstance(domain, lockdown_config.Range):
+                low, high = domain.min, domain.max
+            elif all(isinstance(value, (int, float)) for value in domain.values):
+                low, high = min(domain.values), max(domain.values)
             else:
-                sample_kwargs[name] = values
-
-        option_names = [names for names, _ in option_args]
-        cross_product = itertools.product(
-            *[values for _, values in option_args])
-
-        for option_values in cross_product:
-            for name, value in zip(option_names, option_values):
-                sample_kwargs[name] = value
-            for range_name, range_arg in range_args:
-                sample_kwargs[range_name] = random.uniform(
-                    range_arg.min, range_arg.max)
-            yield sample_kwargs.copy()
+                values = [domain.values.index(value) for value in values]
+                low, high = 0, len(domain.values) - 1
+            column = np.asarray(values, dtype=np.float64) - low
+            columns.append(column / (high - low) if high > low else column)
+        return np.stack(columns, axis=1) if columns else np.zeros(
+            (len(genes_list), 0))
@@ -1,4 +1,7 @@
 """Test the parameter mapper module."""
+import numpy as np
+import pytest
+
 from help_project.src.disease_model.models import compartment_model
 from help_project.src.disease_model.models import parameter_mapper
 from help_project.src.exitstrategies import lockdown_policy
@@ -32,3 +35,91 @@ def test_fit_and_get():
     predicted_params = mapper.get(test_policy)
     assert 0.75 < predicted_params['alpha'] < 1.0
     assert 0.5 < predicted_params['beta'] < 1.0
+
+
+def make_model():
+    """Get a model mapping the curfew to its params."""
+    model = compartment_model.CompartmentModel(None)
+    model.parameter_mapper = {
+        lockdown_policy.LockdownPolicy(curfew=curfew): {
+            'alpha': 0.5 + curfew / 2, 'beta': curfew}
+        for curfew in np.linspace(0, 1, 11)
+    }
+    return model
+
+
+@pytest.mark.parametrize('algorithm', ['brute', 'kd_tree', 'ball_tree'])
+def test_get_many(algorithm):
+    """Test that a batch query matches querying one policy at a time."""
+    mapper = parameter_mapper.ParameterMapper(algorithm=algorithm)
+    mapper.fit([make_model()])
+    policies = lockdown_policy.PolicyMatrix.from_policies([
+        lockdown_policy.LockdownPolicy(curfew=curfew, gathering_size=0.5)
+        for curfew in np.linspace(0, 1, 37)])
+
+    params = mapper.get_many(policies)
+    assert params.shape == (37, 2)
+    for policy, row in zip(policies, params):
+        assert mapper.get(policy) == pytest.approx(dict(zip(['alpha', 'beta'], row)))
+    assert mapper.get_many([]).shape == (0, 2)
+
+
+def test_fit_cache(tmp_path, monkeypatch):
+    """Test that fits on the same data are loaded from the cache."""
+    mapper = parameter_mapper.ParameterMapper(cache_dir=str(tmp_path))
+    mapper.fit([make_model()])
+    assert len(list(tmp_path.iterdir())) == 1
+
+    cached = parameter_mapper.ParameterMapper(cache_dir=str(tmp_path))
+    monkeypatch.setattr(cached.knn, 'fit', None)
+    cached.fit([make_model()])
+    policy = lockdown_policy.LockdownPolicy(curfew=0.33)
+    assert cached.get(policy) == mapper.get(policy)
+
+    # Other settings are fit again
+    other = parameter_mapper.ParameterMapper(n_neighbors=2, cache_dir=str(tmp_path))
+    other.fit([make_model()])
+    assert len(list(tmp_path.iterdir())) == 2
+
+    # As are fits made with another sklearn version
+    monkeypatch.setattr(parameter_mapper.sklearn, '__version__', '0.0.0')
+    upgraded = parameter_mapper.ParameterMapper(cache_dir=str(tmp_path))
+    upgraded.fit([make_model()])
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_fit_cache_corrupt(tmp_path):
+    """Test that unreadable cache files are fit again and replaced."""
+    mapper = parameter_mapper.ParameterMapper(cache_dir=str(tmp_path))
+    mapper.fit([make_model()])
+    cache_file, = tmp_path.iterdir()
+    for contents in (b'', b'not a pickle'):
+        cache_file.write_bytes(contents)
+        refit = parameter_mapper.ParameterMapper(cache_dir=str(tmp_path))
+        refit.fit([make_model()])
+        policy = lockdown_policy.LockdownPolicy(curfew=0.33)
+        assert refit.get(policy) == mapper.get(policy)
+        assert list(tmp_path.iterdir()) == [cache_file]
+        assert cache_file.stat().st_size > len(contents)
+
+
+def test_fit_cache_disabled_by_default():
+    """Test that fits are only cached on disk when asked to."""
+    assert parameter_mapper.ParameterMapper().cache_dir is None
+
+
+def test_compartment_model_uses_batched_mapper():
+    """Test that models query a batched mapper once for all policies."""
+    mapper = parameter_mapper.ParameterMapper()
+    mapper.fit([make_model()])
+    calls = []
+    get_many = mapper.get_many
+    mapper.get_many = lambda policies: calls.append(policies) or get_many(policies)
+
+    model = compartment_model.CompartmentModel(None)
+    model.get_params = lambda: {'alpha': 2.0, 'beta': 1.0}
+    model.parameter_mapper = mapper
+    policies = [lockdown_policy.LockdownPolicy(curfew=curfew) for curfew in (0.2, 0.4)]
+    params = model.get_many_policy_params(policies)
+    assert len(calls) == 1
+    assert params[0] == pytest.approx({'alpha': 2 * 0.6, 'beta': 0.2})
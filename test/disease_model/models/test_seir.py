@@ -2,7 +2,92 @@
 
 Right now, the seir module is used in the main notebook successfuly, so this is
 less urgent."""
+import numpy as np
+import pandas as pd
+
+from help_project.src.disease_model import data
+from help_project.src.disease_model.models import compartment_model
+from help_project.src.disease_model.models import seir
 
 
 def sample_test():
     """Placeholder test."""
+
+
+def test_predict_batch_matches_predict_with_params():
+    """Test that a batched prediction matches predicting each set alone."""
+    population_data = data.PopulationData(
+        population_size=1e6,
+        demographics=None,
+    )
+    seir_model = seir.SEIR()
+    params = [
+        {'beta': 0.5, 'gamma': 0.1, 'sigma': 0.2, 'b': 0, 'mu': 0,
+         'mu_i': 0.1, 'cfr': 0.02, 'initial_exposed_fr': 0.001},
+        {'beta': 1.5, 'gamma': 0.2, 'sigma': 0.4, 'b': 0, 'mu': 1e-5,
+         'mu_i': 0.05, 'cfr': 0.04, 'initial_exposed_fr': 0.0001},
+        {'beta': 0.1, 'gamma': 0.05, 'sigma': 0.1, 'b': 0.01, 'mu': 0,
+         'mu_i': 0.2, 'cfr': 0.01, 'initial_exposed_fr': 0.01},
+    ]
+    health_data = data.HealthData(
+        confirmed_cases=[100],
+        recovered=[10],
+        deaths=[1],
+    )
+    forecast_length = 30
+    batch_predictions = seir_model.predict_batch(
+        population_data, health_data, forecast_length,
+        [seir_model.parameter_config.flatten(p) for p in params])
+
+    assert len(batch_predictions) == len(params)
+    for batch_prediction, single_params in zip(batch_predictions, params):
+        prediction = seir_model.predict_with_params(
+            population_data, health_data, forecast_length, single_params)
+        assert len(batch_prediction) == forecast_length
+        for component in ('exposed_cases', 'confirmed_cases',
+                          'recovered', 'deaths'):
+            np.testing.assert_allclose(
+                getattr(batch_prediction, component),
+                getattr(prediction, component),
+                rtol=1e-2)
+
+
+def test_array_residue_matches_health_data_residue():
+    """Test that the array residue matches the error of the predictions."""
+    population_data = data.PopulationData(
+        population_size=1e6,
+        demographics=None,
+    )
+    seir_model = seir.SEIR()
+    params = {'beta': 0.5, 'gamma': 0.1, 'sigma': 0.2, 'b': 0, 'mu': 0,
+              'mu_i': 0.1, 'cfr': 0.02, 'initial_exposed_fr': 0.001}
+    health_data = data.HealthData(
+        confirmed_cases=pd.Series(np.linspace(100, 1000, 20)),
+        recovered=pd.Series(np.linspace(0, 200, 20)),
+        deaths=pd.Series(np.linspace(0, 20, 20)),
+    )
+
+    # Reference computed through HealthData objects
+    predictions = seir_model.predict_with_params(
+        population_data,
+        data.HealthData(confirmed_cases=[100], recovered=[0], deaths=[0]),
+        len(health_data) - 1,
+        params)
+    expected_health_data = health_data[1:]
+    expected = sum(
+        np.square(
+            np.asarray(getattr(predictions, component)) -
+            getattr(expected_health_data, component).values).mean()
+        for component in ('confirmed_cases', 'recovered', 'deaths'))
+
+    starting_health_data, observed = compartment_model.prepare_residue_data(
+        health_data)
+    assert observed.shape == (3, len(health_data) - 1)
+    flat_params = seir_model.parameter_config.flatten(params)
+    np.testing.assert_allclose(
+        seir_model.array_residue(
+            flat_params, population_data, starting_health_data, observed),
+        expected)
+    np.testing.assert_allclose(
+        seir_model.residue(flat_params, population_data, health_data),
+        expected)
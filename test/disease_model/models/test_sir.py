@@ -81,6 +81,32 @@ def test_predict_with_some_cases():
     assert all(predictions.deaths == 0)
 
 
+def test_vectorized_equations_match_flat_equations():
+    """Test that evaluating many states at once matches one at a time."""
+    sir_model = sir.SIR()
+    params = {
+        'beta': 0.5,
+        'gamma': 0.1,
+        'b': 0.01,
+        'mu': 0.001,
+        'mu_i': 0.1,
+        'cfr': 0.05,
+    }
+    states = np.array([
+        [1e6, 100, 10, 1],
+        [5e5, 2e4, 1e3, 50],
+        [1e3, 0, 0, 0],
+    ])
+    batched = sir_model.vectorized_equations(
+        0, states.T, sir_model.resolve_equation_params(
+            sir_model.parameter_config.to_array(params)))
+    for column, state in enumerate(states):
+        np.testing.assert_allclose(
+            batched[:, column],
+            sir_model.differential_equations(
+                0, state, *sir_model.parameter_config.flatten(params)))
+
+
 @pytest.mark.slow
 def test_fit():
     """Test that the fit function obtains sensible params."""
@@ -138,3 +164,86 @@ def test_fit():
         model.parameter_config.flatten(trained_params),
         model.parameter_config.flatten(ground_truth_params),
         decimal=1)
+
+
+def chain_applications(model, population_data, past_health_data, scenario):
+    """Predict each application of a scenario from the end of the previous."""
+    current_health_data = past_health_data
+    predictions = []
+    for policy_application in scenario.policies:
+        params = model.get_params()
+        for param, value in model.parameter_mapper[
+                policy_application.policy].items():
+            params[param] *= value
+        current_health_data = model.predict_with_params(
+            population_data,
+            current_health_data,
+            forecast_length=len(policy_application),
+            params=params,
+        )
+        predictions.append(current_health_data)
+    return data.HealthData.concatenate(predictions)
+
+
+def test_predict_scenarios_shares_prefixes():
+    """Test that scenarios match chained predictions and share prefixes."""
+    population_data = data.PopulationData(
+        population_size=1e6,
+        demographics=None,
+    )
+    sir_model = sir.SIR()
+    sir_model.set_params({
+        'beta': 0.5,
+        'gamma': 0.1,
+        'b': 0,
+        'mu': 0,
+        'mu_i': 0.1,
+        'cfr': 0.1,
+    })
+    # A dict's get behaves like the ParameterMapper's for known policies
+    sir_model.parameter_mapper = {
+        lockdown_policy.LockdownPolicy(): {},
+        lockdown_policy.LockdownPolicy(gathering_size=0): {'beta': 0.5},
+    }
+
+    initial_date = datetime.date(2020, 3, 1)
+    past_health_data = data.HealthData(
+        confirmed_cases=[100],
+        recovered=[0],
+        deaths=[0],
+    )
+
+    def application(policy, start, end):
+        return lockdown_policy.LockdownPolicyApplication(
+            policy=policy,
+            start=initial_date + datetime.timedelta(start),
+            end=initial_date + datetime.timedelta(end))
+
+    open_policy = lockdown_policy.LockdownPolicy()
+    closed_policy = lockdown_policy.LockdownPolicy(gathering_size=0)
+    common = [application(closed_policy, 1, 11), application(open_policy, 11, 21)]
+    scenarios = [
+        lockdown_policy.LockdownTimeSeries(
+            common + [application(policy, 21, 31)])
+        for policy in (open_policy, closed_policy)
+    ] + [lockdown_policy.LockdownTimeSeries(common[:1]),
+         # A gap between applications, whose dates must not shift
+         lockdown_policy.LockdownTimeSeries(
+             common[:1] + [application(open_policy, 15, 20)])]
+
+    calls = []
+    integrate = sir_model.integrate
+    sir_model.integrate = lambda *args: calls.append(args) or integrate(*args)
+    predictions = sir_model.predict_scenarios(
+        population_data, past_health_data, scenarios)
+    # Two shared applications plus one branch for each of the three scenarios
+    assert len(calls) == 5
+
+    sir_model.prediction_cache.clear()
+    for scenario, prediction in zip(scenarios, predictions):
+        expected = chain_applications(
+            sir_model, population_data, past_health_data, scenario)
+        assert len(prediction) == len(scenario)
+        np.testing.assert_allclose(prediction.to_array(), expected.to_array())
+        pd.testing.assert_index_equal(prediction.index, scenario.dates())
+    assert predictions[-1].index[10] == pd.Timestamp(2020, 3, 16)
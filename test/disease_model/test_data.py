@@ -210,3 +210,18 @@ def test_set_index_on_nparray():
     np.testing.assert_array_equal(data_sample.deaths.index, index)
     np.testing.assert_array_equal(data_sample.exposed_cases.index, index)
     assert data_sample.unreported_cases is None
+
+
+def test_to_array():
+    """Test that the components are stacked as float rows in order."""
+    data_sample = data.HealthData(
+        confirmed_cases=pd.Series([0, 1, 2]),
+        recovered=[0, 0, 1],
+        deaths=np.array([0, 0, 2]),
+        exposed_cases=np.array([3, 4, 5]),
+    )
+    values = data_sample.to_array()
+    assert values.dtype == np.float64
+    np.testing.assert_array_equal(values, [[0, 1, 2], [0, 0, 1], [0, 0, 2]])
+    np.testing.assert_array_equal(
+        data_sample.to_array(['exposed_cases']), [[3, 4, 5]])
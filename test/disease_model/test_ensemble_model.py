@@ -1,4 +1,5 @@
 """Test for ensemble model module."""
+import time
 from unittest import mock
 import pytest
 import numpy as np
@@ -55,6 +56,117 @@ def test_ensemble_model_predict_averages_all_submodules():
     submodel_2.predict.assert_called_once_with(None, None, None)
 
 
+class ConstantModel(base_model.BaseDiseaseModel):
+    """Model predicting a constant, which is set when fitting."""
+
+    def __init__(self, value, fail=False):
+        self.value = value
+        self.fail = fail
+        self.fitted = False
+
+    def fit(self, population_data, health_data, policy_data):
+        if self.fail:
+            raise ValueError('Diverged')
+        self.fitted = True
+        return True
+
+    def predict(self, population_data, past_health_data, future_policy_data):
+        assert self.fitted
+        return data.HealthData(
+            confirmed_cases=np.array([self.value] * 2),
+            recovered=np.array([0, 0]),
+            deaths=np.array([0, 0]),
+        )
+
+
+@pytest.mark.parametrize('executor', [None, 'thread', 'process'])
+def test_ensemble_model_concurrent_execution(executor):
+    """Ensure members run with every executor and fitted state is kept."""
+    ensemble = ensemble_model.EnsembleModel(
+        [ConstantModel(1), ConstantModel(3)], executor=executor)
+    assert ensemble.fit(None, None, None)
+    assert all(model.fitted for model in ensemble.models)
+    result = ensemble.predict(None, None, None)
+    np.testing.assert_array_equal(result.confirmed_cases, [2, 2])
+    for status in ensemble.member_status:
+        assert status.fit_time >= 0
+        assert status.predict_time >= 0
+        assert status.fit_error is None
+        assert status.predict_error is None
+
+
+class SlowModel(ConstantModel):
+    """Constant model taking a while to fit."""
+
+    def fit(self, population_data, health_data, policy_data):
+        time.sleep(0.5)
+        return super().fit(population_data, health_data, policy_data)
+
+
+class ScheduledModel(ConstantModel):
+    """Constant model noting the fit scheduler it was fitted with."""
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.fit_scheduler = None
+        self.fit_workers = None
+
+    def fit(self, population_data, health_data, policy_data):
+        self.fit_workers = self.fit_scheduler.workers
+        return super().fit(population_data, health_data, policy_data)
+
+
+def test_ensemble_model_raises_without_executor():
+    """Ensure member errors propagate when members run one after the other."""
+    ensemble = ensemble_model.EnsembleModel(
+        [ConstantModel(1, fail=True), ConstantModel(3)])
+    with pytest.raises(ValueError):
+        ensemble.fit(None, None, None)
+
+
+def test_ensemble_model_drops_timed_out_members():
+    """Ensure a member that timed out does not modify the ensemble later."""
+    slow = SlowModel(1)
+    ensemble = ensemble_model.EnsembleModel(
+        [slow, ConstantModel(3)], executor='thread', timeout=0.1)
+    assert not ensemble.fit(None, None, None)
+    assert isinstance(ensemble.member_status[0].fit_error,
+                      ensemble_model.futures.TimeoutError)
+    time.sleep(0.6)
+    assert ensemble.models[0] is slow
+    assert not slow.fitted
+    result = ensemble.predict(None, None, None)
+    np.testing.assert_array_equal(result.confirmed_cases, [3, 3])
+
+
+def test_ensemble_model_process_members_fit_alone():
+    """Ensure members on processes don't start optimizer pools of their own."""
+    ensemble = ensemble_model.EnsembleModel(
+        [ScheduledModel(1), ScheduledModel(3)], executor='process')
+    assert ensemble.fit(None, None, None)
+    for model in ensemble.models:
+        assert model.fit_workers == 1
+        assert model.fit_scheduler is None
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_ensemble_model_isolates_failures(executor):
+    """Ensure a failing member is recorded and left out of predictions."""
+    ensemble = ensemble_model.EnsembleModel(
+        [ConstantModel(1, fail=True), ConstantModel(3)], executor=executor)
+    assert not ensemble.fit(None, None, None)
+    assert isinstance(ensemble.member_status[0].fit_error, ValueError)
+    assert ensemble.member_status[1].fit_error is None
+    result = ensemble.predict(None, None, None)
+    np.testing.assert_array_equal(result.confirmed_cases, [3, 3])
+
+
+def test_ensemble_model_rejects_unknown_executor():
+    """Ensure only known executors are accepted."""
+    with pytest.raises(ValueError):
+        ensemble_model.EnsembleModel(executor='cluster')
+
+
 @pytest.mark.slow
 def test_ensemble_model_runs_without_failure():
     """Ensure ensemble model runs end-to-end without failure."""
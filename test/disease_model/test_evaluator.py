@@ -0,0 +1,86 @@
+"""Test the evaluator module."""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from help_project.src.disease_model import data
+from help_project.src.disease_model import ensemble_model
+from help_project.src.disease_model import evaluator
+from help_project.src.disease_model.models import sir
+from help_project.src.exitstrategies import lockdown_policy
+
+
+def make_scenario():
+    """Get a population and some past health data for the tests."""
+    population_data = data.PopulationData(
+        population_size=1e6,
+        demographics=None,
+    )
+    index = pd.date_range('2020-03-01', periods=3)
+    past_health_data = data.HealthData(
+        confirmed_cases=pd.Series([50, 75, 100], index=index),
+        recovered=pd.Series([0, 5, 10], index=index),
+        deaths=pd.Series([0, 0, 1], index=index),
+    )
+    return population_data, past_health_data
+
+
+def make_model():
+    """Get a SIR model whose params depend on the gathering size."""
+    model = sir.SIR()
+    model.set_params({
+        'beta': 0.5,
+        'gamma': 0.1,
+        'b': 0,
+        'mu': 0,
+        'mu_i': 0.1,
+        'cfr': 0.1,
+    })
+    model.parameter_mapper = {
+        lockdown_policy.LockdownPolicy(): {},
+        lockdown_policy.LockdownPolicy(gathering_size=0): {'beta': 0.5},
+    }
+    return model
+
+
+def test_run_matches_predict():
+    """Test that running a policy gives the same output as predict."""
+    population_data, past_health_data = make_scenario()
+    model = make_model()
+    health_evaluator = evaluator.HealthEvaluator(
+        model, population_data, past_health_data, forecast_length=10)
+    assert health_evaluator.start == datetime.date(2020, 3, 4)
+
+    policy = lockdown_policy.LockdownPolicy(gathering_size=0)
+    output = health_evaluator.run(policy)
+    expected = model.predict(
+        population_data, health_evaluator.past_health_data,
+        health_evaluator.policy_timeseries(policy))
+
+    assert len(output) == 10
+    pd.testing.assert_index_equal(output.index, expected.index)
+    np.testing.assert_allclose(output.to_array(), expected.to_array())
+    # Policies can also be given by their keyword arguments
+    np.testing.assert_allclose(
+        health_evaluator({'gathering_size': 0}).to_array(), output.to_array())
+    # Tighter gatherings mean fewer cases
+    assert (health_evaluator.run(lockdown_policy.LockdownPolicy())
+            .confirmed_cases.iloc[-1] > output.confirmed_cases.iloc[-1])
+
+
+def test_run_with_ensemble():
+    """Test that other models go through predict with the bound data."""
+    population_data, _ = make_scenario()
+    past_health_data = data.HealthData(
+        confirmed_cases=[100],
+        recovered=[10],
+        deaths=[1],
+    )
+    model = ensemble_model.EnsembleModel(models=[make_model(), make_model()])
+    health_evaluator = evaluator.HealthEvaluator(
+        model, population_data, past_health_data, forecast_length=5,
+        start=datetime.date(2020, 4, 1))
+    output = health_evaluator.run(lockdown_policy.LockdownPolicy())
+    assert len(output) == 5
+    assert output.index[0] == pd.Timestamp('2020-04-01')
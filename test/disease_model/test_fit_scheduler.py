@@ -0,0 +1,78 @@
+"""Tests for the fit_scheduler module."""
+import datetime
+import os
+import numpy as np
+import pandas as pd
+
+from help_project.src.disease_model import data
+from help_project.src.disease_model import fit_scheduler
+from help_project.src.disease_model.models import sir
+from help_project.src.exitstrategies import lockdown_policy
+
+
+class StubSIR(sir.SIR):
+    """SIR model whose fit just reports the slice it was given."""
+
+    def compute_fit_for_single_policy(
+            self, population_data, health_data, workers=-1):
+        assert workers == 1
+        return {
+            'beta': float(len(health_data)),
+            'gamma': 0.1,
+            'b': 0,
+            'mu': 0,
+            'mu_i': 0.1,
+            'cfr': float(os.getpid()),
+        }
+
+
+def get_fit_inputs():
+    """Get health data and a policy time series with three slices."""
+    start = datetime.date(2020, 3, 1)
+    index = pd.date_range(start, periods=30)
+    health_data = data.HealthData(
+        confirmed_cases=pd.Series(np.arange(30), index=index),
+        recovered=pd.Series(np.zeros(30), index=index),
+        deaths=pd.Series(np.zeros(30), index=index),
+    )
+    policy_data = lockdown_policy.LockdownTimeSeries(
+        policies=[
+            lockdown_policy.LockdownPolicyApplication(
+                policy=lockdown_policy.LockdownPolicy(curfew=curfew),
+                start=start + datetime.timedelta(days=offset),
+                end=start + datetime.timedelta(days=offset + length),
+            )
+            for curfew, offset, length in [(1.0, 0, 5), (0.5, 5, 10),
+                                           (0.0, 15, 15)]
+        ])
+    return health_data, policy_data
+
+
+def test_fit_slices_on_shared_pool():
+    """Test that every slice is fit on the pool and aggregated in order."""
+    health_data, policy_data = get_fit_inputs()
+    population_data = data.PopulationData(1e6, None)
+    model = StubSIR()
+    with fit_scheduler.FitScheduler(workers=2) as scheduler:
+        model.fit_scheduler = scheduler
+        model.fit(population_data, health_data, policy_data)
+        executor = scheduler._executor  # pylint: disable=protected-access
+        model.fit(population_data, health_data, policy_data)
+        # The pool is kept between fits
+        assert scheduler._executor is executor  # pylint: disable=protected-access
+
+    assert model.get_params()['beta'] == 15
+    assert model.get_params()['cfr'] != os.getpid()
+    # Label slices include the end date, apart from the last one
+    betas = [params['beta'] for params in model.parameter_mapper.values()]
+    np.testing.assert_allclose(betas, [6 / 15, 11 / 15, 1])
+
+
+def test_single_worker_runs_in_process():
+    """Test that a single worker fits in the calling process."""
+    health_data, policy_data = get_fit_inputs()
+    model = StubSIR()
+    model.fit_scheduler = fit_scheduler.FitScheduler(workers=1)
+    model.fit(data.PopulationData(1e6, None), health_data, policy_data)
+    assert model.get_params()['cfr'] == os.getpid()
+    assert model.fit_scheduler._executor is None  # pylint: disable=protected-access
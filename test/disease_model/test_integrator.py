@@ -0,0 +1,135 @@
+"""Tests for the integrator module."""
+import timeit
+import pytest
+import numpy as np
+
+from help_project.src.disease_model import data
+from help_project.src.disease_model import integrator
+from help_project.src.disease_model.models import sir
+
+SIR_PARAMS = {
+    'beta': 0.3,
+    'gamma': 0.1,
+    'b': 0,
+    'mu': 0,
+    'mu_i': 0.1,
+    'cfr': 0.05,
+}
+
+
+def predict_sir(integrator_backend, forecast_length=60, params=None):
+    """Predict a small SIR outbreak with the given integrator."""
+    population_data = data.PopulationData(
+        population_size=1e6,
+        demographics=None,
+    )
+    health_data = data.HealthData(
+        confirmed_cases=[100],
+        recovered=[0],
+        deaths=[0],
+    )
+    model = sir.SIR(integrator_backend=integrator_backend)
+    return model.predict_with_params(
+        population_data, health_data, forecast_length, params or SIR_PARAMS)
+
+
+class CountingEquations():  # pylint: disable=too-few-public-methods
+    """Exponential decay equations that count their evaluations."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.calls = 0
+
+    def __call__(self, _, state):
+        self.calls += 1
+        return -self.rate * state
+
+
+@pytest.mark.parametrize('integrator_backend', [
+    integrator.ScipyIntegrator(),
+    integrator.RK4Integrator(),
+    integrator.RK4Integrator(steps_per_day=4),
+    integrator.DifferenceIntegrator(),
+])
+def test_output_shape(integrator_backend):
+    """Test that stacked states keep their shape with a trailing day axis."""
+    initial_state = np.ones((3, 2))
+    output = integrator_backend.integrate(
+        CountingEquations(0.1), initial_state, 5)
+    assert output.shape == (3, 2, 5)
+
+
+def test_rk4_accuracy_against_scipy():
+    """Test that RK4 matches the adaptive solver closely."""
+    reference = predict_sir(integrator.ScipyIntegrator(rtol=1e-8, atol=1e-6))
+    default = predict_sir(integrator.ScipyIntegrator())
+    for steps_per_day in (1, 4):
+        prediction = predict_sir(integrator.RK4Integrator(steps_per_day))
+        for component in ('confirmed_cases', 'recovered', 'deaths'):
+            expected = getattr(reference, component)
+            # RK4 should be at least as accurate as the default solver
+            tolerance = max(
+                1e-4, np.max(np.abs(getattr(default, component) - expected) /
+                             np.maximum(expected, 1)))
+            np.testing.assert_allclose(
+                getattr(prediction, component), expected, rtol=tolerance,
+                atol=1)
+
+
+def test_difference_accuracy_against_scipy():
+    """Test that the difference equations match the solver for slow rates."""
+    slow_params = dict(SIR_PARAMS, beta=0.12, gamma=0.1)
+    reference = predict_sir(integrator.ScipyIntegrator(), params=slow_params)
+    prediction = predict_sir(
+        integrator.DifferenceIntegrator(), params=slow_params)
+    for component in ('confirmed_cases', 'recovered', 'deaths'):
+        np.testing.assert_allclose(
+            getattr(prediction, component), getattr(reference, component),
+            rtol=0.1, atol=1)
+
+
+def test_fixed_step_cost():
+    """Test that fixed-step integrators do a fixed amount of work."""
+    equations = CountingEquations(0.1)
+    integrator.RK4Integrator(steps_per_day=3).integrate(
+        equations, np.ones(4), 10)
+    assert equations.calls == 4 * 3 * 10
+
+    equations = CountingEquations(0.1)
+    integrator.DifferenceIntegrator().integrate(equations, np.ones(4), 10)
+    assert equations.calls == 10
+
+
+@pytest.mark.parametrize('blow_up', [0.5, 2.5])
+def test_scipy_failed_solve(blow_up):
+    """Test that the days after a failed solve are NaN instead of raising."""
+    # y' = y^2 blows up at t = 1 / y0, where the solver gives up
+    initial_state = np.array([1 / blow_up, 0.1])
+    output = integrator.ScipyIntegrator().integrate(
+        lambda _, state: state ** 2, initial_state, 5)
+    assert output.shape == (2, 5)
+    solved = int(blow_up)
+    days = np.arange(1, solved + 1)
+    np.testing.assert_allclose(
+        output[..., :solved], 1 / (1 / initial_state[:, None] - days), rtol=1e-2)
+    assert np.isnan(output[..., solved:]).all()
+
+
+def test_rk4_rejects_invalid_steps():
+    """Test that a non-positive number of steps is not accepted."""
+    with pytest.raises(ValueError):
+        integrator.RK4Integrator(steps_per_day=0)
+
+
+@pytest.mark.slow
+def test_speed_against_scipy():
+    """Test that the cheap backends are not slower than the solver."""
+    def time_backend(integrator_backend):
+        return min(timeit.repeat(
+            lambda: predict_sir(integrator_backend, forecast_length=200),
+            number=5, repeat=3))
+
+    scipy_time = time_backend(integrator.ScipyIntegrator())
+    assert time_backend(integrator.DifferenceIntegrator()) < scipy_time
+    # RK4 with one step a day does a similar number of evaluations
+    assert time_backend(integrator.RK4Integrator()) < 2 * scipy_time
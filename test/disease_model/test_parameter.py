@@ -1,4 +1,5 @@
 """Test for base model module."""
+import numpy as np
 from help_project.src.disease_model import parameter
 
 
@@ -34,3 +35,20 @@ def test_config_flatten():
                             bounds=[0, 1]),
     )
     assert config.flatten({'a': 2, 'b': 1}) == [2, 1]
+
+
+def test_config_to_array_and_index():
+    """Test that to_array and index agree on the parameter positions."""
+    config = parameter.ParameterConfig(
+        parameter.Parameter(name='a',
+                            description='A parameter',
+                            bounds=[0, 5]),
+        parameter.Parameter(name='b',
+                            description='Another parameter',
+                            bounds=[0, 1]),
+    )
+    values = config.to_array({'b': 1, 'a': 2})
+    assert values.dtype == np.float64
+    assert list(values) == [2.0, 1.0]
+    assert config.index('b', 'a') == (1, 0)
+    assert len(config) == 2
@@ -0,0 +1,95 @@
+"""Tests for the prediction_cache module."""
+from concurrent import futures
+import pickle
+
+import numpy as np
+
+from help_project.src.disease_model import data
+from help_project.src.disease_model import integrator
+from help_project.src.disease_model import prediction_cache
+from help_project.src.disease_model.models import sir
+
+
+def test_lru_eviction_by_entries_and_size():
+    """Test that the least recently used entries are evicted first."""
+    cache = prediction_cache.PredictionCache(max_entries=2, max_bytes=None)
+    cache.put('a', np.zeros(2))
+    cache.put('b', np.zeros(2))
+    assert cache.get('a') is not None  # 'b' is now the least recent
+    cache.put('c', np.zeros(2))
+    assert cache.get('b') is None
+    assert len(cache) == 2
+
+    cache = prediction_cache.PredictionCache(max_entries=10, max_bytes=32)
+    cache.put('a', np.zeros(2))
+    cache.put('b', np.zeros(2))
+    cache.put('c', np.zeros(2))
+    assert cache.get('a') is None
+    assert cache.size == 32
+    assert cache.put('d', np.zeros(10)) is not None
+    assert 'd' not in cache.entries
+
+
+def test_stored_values_are_read_only():
+    """Test that stored values can't be modified by whoever gets them."""
+    cache = prediction_cache.PredictionCache()
+    value = np.zeros(3)
+    cache.put('a', value)
+    value[0] = 1
+    assert not cache.get('a').flags.writeable
+    assert cache.get('a')[0] == 0
+
+
+def test_shared_between_threads():
+    """Test that concurrent gets and puts keep the cache consistent."""
+    cache = prediction_cache.PredictionCache(max_entries=8, max_bytes=None)
+
+    def use(start):
+        for i in range(start, start + 500):
+            cache.put(i % 16, np.zeros(2))
+            cache.get((i + 1) % 16)
+
+    with futures.ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(use, range(0, 2000, 500)))
+    assert len(cache) == 8
+    assert cache.size == sum(value.nbytes for value in cache.entries.values())
+
+    copy = pickle.loads(pickle.dumps(cache))
+    assert len(copy) == 8
+    copy.put('a', np.zeros(2))
+
+
+def test_make_key_from_arrays():
+    """Test that keys match for equal values, whatever their container."""
+    make_key = prediction_cache.PredictionCache.make_key
+    assert make_key('p', np.array([1, 2]), 3) == make_key('p', [1.0, 2.0], 3)
+    assert make_key('p', [1, 2], 3) != make_key('p', [1, 2], 4)
+
+
+def test_model_predictions_are_cached_and_invalidated():
+    """Test that repeated predictions hit the cache until params change."""
+    model = sir.SIR()
+    params = {'beta': 0.5, 'gamma': 0.1, 'b': 0, 'mu': 0,
+              'mu_i': 0.1, 'cfr': 0.05}
+    population_data = data.PopulationData(1e6, None)
+    health_data = data.HealthData(
+        confirmed_cases=[100], recovered=[0], deaths=[0])
+
+    first = model.predict_with_params(
+        population_data, health_data, 10, params)
+    second = model.predict_with_params(
+        population_data, health_data, 10, params)
+    np.testing.assert_array_equal(
+        first.confirmed_cases, second.confirmed_cases)
+    assert model.prediction_cache.hits == 1
+    assert model.prediction_cache.misses == 1
+
+    model.predict_with_params(
+        population_data, health_data, 10, dict(params, beta=0.6))
+    assert model.prediction_cache.misses == 2
+
+    model.set_params(params)
+    assert not model.prediction_cache
+    model.predict_with_params(population_data, health_data, 10, params)
+    model.integrator = integrator.RK4Integrator()
+    assert not model.prediction_cache
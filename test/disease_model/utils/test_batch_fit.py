@@ -0,0 +1,66 @@
+"""Tests for batch_fit module."""
+import os
+import numpy as np
+import pandas as pd
+
+from help_project.src.disease_model import data
+from help_project.src.disease_model.models import sir
+from help_project.src.disease_model.utils import batch_fit
+
+
+class FakeFetcher():
+    """Fetcher with made up data for a few countries."""
+
+    def get_countries(self):
+        return ['Chile', 'Korea, Rep.', 'Atlantis']
+
+    def get_population_data(self, country):
+        return data.PopulationData(population_size=1e6, demographics=None)
+
+    def get_health_data(self, country):
+        length = 0 if country == 'Atlantis' else 10
+        index = pd.date_range('2020-03-01', periods=length)
+        return data.HealthData(
+            confirmed_cases=pd.Series(np.arange(length), index=index),
+            recovered=pd.Series(np.zeros(length), index=index),
+            deaths=pd.Series(np.zeros(length), index=index),
+        )
+
+
+class StubSIR(sir.SIR):
+    """SIR model whose fit just reports the process it ran in."""
+
+    def compute_fit_for_single_policy(
+            self, population_data, health_data, workers=-1):
+        return {'beta': float(os.getpid()), 'gamma': 0.1, 'b': 0, 'mu': 0,
+                'mu_i': 0.1, 'cfr': 0.01}
+
+
+def test_run_stores_results_and_resumes(tmpdir):
+    """Test that results are stored per country and reruns skip them."""
+    fitter = batch_fit.BatchFitter(
+        str(tmpdir), model_factory=StubSIR, workers=2,
+        fetcher_factory=FakeFetcher)
+    errors = fitter.run()
+
+    assert list(errors) == ['Atlantis']
+    assert fitter.completed_countries() == {'Chile', 'Korea, Rep.'}
+    result = fitter.load('Korea, Rep.')
+    assert result['success']
+    assert result['params']['beta'] != os.getpid()
+    assert len(result['parameter_mapper']) == 1
+
+    # A rerun only retries what failed and keeps the stored results
+    errors = fitter.run()
+    assert list(errors) == ['Atlantis']
+    assert fitter.load('Korea, Rep.') == result
+
+
+def test_run_in_process(tmpdir):
+    """Test that a single worker fits the countries in this process."""
+    fitter = batch_fit.BatchFitter(
+        str(tmpdir), model_factory=StubSIR, workers=1,
+        fetcher_factory=FakeFetcher)
+    errors = fitter.run(['Chile'])
+    assert not errors
+    assert fitter.load('Chile')['params']['beta'] == os.getpid()
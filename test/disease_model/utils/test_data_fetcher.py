@@ -1,4 +1,9 @@
 """Tests for data_fetcher module."""
+import os
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pytest
 from help_project.src.disease_model.utils import data_fetcher
 
 
@@ -18,3 +23,153 @@ def test_get_population_data():
     fetcher = data_fetcher.DataFetcher()
     cl_population_data = fetcher.get_population_data('Chile')
     assert 1e7 < cl_population_data.population_size < 2e7
+
+
+def test_build_country_index():
+    """Test that the time series are summed per country."""
+    confirmed = pd.DataFrame({
+        'sub_zone': ['North', 'South', None],
+        'zone': ['Chile', 'Chile', 'Peru'],
+        'Lat': [0, 0, 0],
+        'Long': [0, 0, 0],
+        '1/22/20': [1, 2, 3],
+        '1/23/20': [4, 5, 6],
+    })
+    deaths = confirmed.copy()
+    deaths['1/23/20'] = [0, 1, 0]
+    # A country only present in one of the files
+    deaths.loc[3] = [None, 'Narnia', 0, 0, 7, 8]
+
+    country_rows, dates, (confirmed_array, deaths_array) = \
+        data_fetcher.build_country_index([confirmed, deaths])
+
+    assert set(country_rows) == {'Chile', 'Peru', 'Narnia'}
+    np.testing.assert_array_equal(
+        dates, pd.to_datetime(['2020-01-22', '2020-01-23']))
+    np.testing.assert_array_equal(confirmed_array[country_rows['Chile']], [3, 9])
+    np.testing.assert_array_equal(confirmed_array[country_rows['Peru']], [3, 6])
+    np.testing.assert_array_equal(deaths_array[country_rows['Chile']], [3, 1])
+    np.testing.assert_array_equal(deaths_array[country_rows['Narnia']], [7, 8])
+    np.testing.assert_array_equal(confirmed_array[country_rows['Narnia']], 0)
+    assert not confirmed_array.flags.writeable
+
+
+def write_time_series(directory, values):
+    """Write JHU style time series files with the given value per cell."""
+    for file_name in data_fetcher.TIME_SERIES_FILES.values():
+        pd.DataFrame({
+            'Province/State': [None, None],
+            'Country/Region': ['Chile', 'Peru'],
+            'Lat': [0, 0],
+            'Long': [0, 0],
+            '3/1/20': [values, 2 * values],
+            '3/2/20': [values, 3 * values],
+        }).to_csv(os.path.join(directory, file_name), index=False)
+
+
+def test_fetcher_uses_and_invalidates_cache(tmpdir, monkeypatch):
+    """Test that the cache is used until the source files change."""
+    data_dir = tmpdir.mkdir('data')
+    data_dir.mkdir('COVID-19')  # Avoid cloning the repo
+    series_dir = str(tmpdir.mkdir('series'))
+    monkeypatch.setattr(data_fetcher, 'DATA_DIR', str(data_dir))
+    monkeypatch.setattr(data_fetcher, 'TIME_SERIES_DIR', series_dir)
+    monkeypatch.setattr(data_fetcher, 'CACHE_DIR', str(tmpdir.join('cache')))
+    write_time_series(series_dir, 1)
+
+    fetcher = data_fetcher.DataFetcher()
+    np.testing.assert_array_equal(
+        fetcher.get_health_data('Peru').confirmed_cases, [2, 3])
+    assert 1e7 < fetcher.get_population_data('Chile').population_size < 2e7
+
+    # Loading again must not parse the CSVs
+    with mock.patch.object(data_fetcher, 'get_dfs') as get_dfs:
+        cached_fetcher = data_fetcher.DataFetcher()
+        get_dfs.assert_not_called()
+    health_data = cached_fetcher.get_health_data('Peru')
+    np.testing.assert_array_equal(health_data.confirmed_cases, [2, 3])
+    np.testing.assert_array_equal(
+        health_data.index, pd.to_datetime(['2020-03-01', '2020-03-02']))
+    assert cached_fetcher.get_countries() == fetcher.get_countries()
+
+    # The series can be edited without touching the read-only cache
+    assert not cached_fetcher.get_health_arrays('Peru')['confirmed'].flags.writeable
+    health_data.confirmed_cases.iloc[0] = 100
+    health_data.deaths += 1
+    np.testing.assert_array_equal(
+        cached_fetcher.get_health_data('Peru').confirmed_cases, [2, 3])
+
+    # Changing the sources rebuilds the cache
+    write_time_series(series_dir, 10)
+    for file_name in data_fetcher.TIME_SERIES_FILES.values():
+        os.utime(os.path.join(series_dir, file_name), ns=(0, 0))
+    updated_fetcher = data_fetcher.DataFetcher()
+    np.testing.assert_array_equal(
+        updated_fetcher.get_health_data('Peru').deaths, [20, 30])
+
+
+def test_refresh_appends_new_daily_reports(tmpdir, monkeypatch):
+    """Test that refresh appends new days and reports changed countries."""
+    data_dir = tmpdir.mkdir('data')
+    data_dir.mkdir('COVID-19')  # Avoid cloning the repo
+    series_dir = str(tmpdir.mkdir('series'))
+    reports_dir = tmpdir.mkdir('reports')
+    monkeypatch.setattr(data_fetcher, 'DATA_DIR', str(data_dir))
+    monkeypatch.setattr(data_fetcher, 'TIME_SERIES_DIR', series_dir)
+    monkeypatch.setattr(data_fetcher, 'CACHE_DIR', str(tmpdir.join('cache')))
+    write_time_series(series_dir, 1)
+    fetcher = data_fetcher.DataFetcher()
+
+    # Already loaded days are ignored, and the format changed over time
+    pd.DataFrame({
+        'Country/Region': ['Chile', 'Peru'],
+        'Confirmed': [0, 0], 'Deaths': [0, 0], 'Recovered': [0, 0],
+    }).to_csv(str(reports_dir.join('03-02-2020.csv')), index=False)
+    pd.DataFrame({
+        'Province_State': ['North', 'South', None],
+        'Country_Region': ['Chile', 'Chile', 'Peru'],
+        'Confirmed': [2, 3, 3], 'Deaths': [2, 3, 3], 'Recovered': [2, 3, 3],
+    }).to_csv(str(reports_dir.join('03-03-2020.csv')), index=False)
+    pd.DataFrame({
+        'Country_Region': ['Chile', 'Narnia'],
+        'Confirmed': [5, 1], 'Deaths': [5, 1], 'Recovered': [5, 1],
+    }).to_csv(str(reports_dir.join('03-04-2020.csv')), index=False)
+
+    cache_dir = tmpdir.join('cache')
+    cached_files = {name: os.path.getmtime(str(cache_dir.join(name)))
+                    for name in os.listdir(str(cache_dir))
+                    if name.endswith('.npy')}
+    changed = fetcher.refresh(str(reports_dir))
+    assert changed == {'Chile', 'Narnia'}
+    # The loaded data is kept as is, only the new days are written
+    assert len(fetcher.blocks) == 2
+    assert fetcher.blocks[1]['confirmed'].shape == (3, 2)
+    for name, mtime in cached_files.items():
+        assert os.path.getmtime(str(cache_dir.join(name))) == mtime
+    assert len([name for name in os.listdir(str(cache_dir))
+                if name.endswith('.npy')]) == len(cached_files) + 3
+    health_data = fetcher.get_health_data('Chile')
+    np.testing.assert_array_equal(health_data.confirmed_cases, [1, 1, 5, 5])
+    assert health_data.index[-1] == pd.Timestamp('2020-03-04')
+    np.testing.assert_array_equal(
+        fetcher.get_health_data('Peru').deaths, [2, 3, 3, 3])
+    np.testing.assert_array_equal(
+        fetcher.get_health_data('Narnia').recovered, [0, 0, 0, 1])
+    assert fetcher.refresh(str(reports_dir)) == set()
+
+    # The cache holds the refreshed data
+    with mock.patch.object(data_fetcher, 'get_dfs') as get_dfs:
+        cached_fetcher = data_fetcher.DataFetcher()
+        get_dfs.assert_not_called()
+    np.testing.assert_array_equal(
+        cached_fetcher.get_health_data('Chile').confirmed_cases, [1, 1, 5, 5])
+    np.testing.assert_array_equal(
+        cached_fetcher.get_health_data('Narnia').recovered, [0, 0, 0, 1])
+
+    # Gaps in the reports are not allowed
+    pd.DataFrame({
+        'Country_Region': ['Chile'],
+        'Confirmed': [6], 'Deaths': [6], 'Recovered': [6],
+    }).to_csv(str(reports_dir.join('03-06-2020.csv')), index=False)
+    with pytest.raises(ValueError):
+        fetcher.refresh(str(reports_dir))
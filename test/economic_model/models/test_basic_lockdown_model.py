@@ -2,6 +2,8 @@
 Test economic model
 """
 import datetime
+import numpy as np
+import pytest
 from help_project.src.exitstrategies import lockdown_policy
 from help_project.src.economic_model.models.basic_lockdown_model import EconomicLockdownModel
 
@@ -27,3 +29,73 @@ def test_economic_model():
         ])
     economic_vector = EconomicLockdownModel().get_economic_vector(lockdown_policy=policy_timeseries)
     assert len(economic_vector.keys()) > 0
+
+
+def test_sector_outputs():
+    """
+    test that sector outputs average the mapped lockdown fields
+    """
+    model = EconomicLockdownModel()
+    policies = [
+        lockdown_policy.LockdownPolicy(),
+        lockdown_policy.LockdownPolicy(chemical=0.2, manufacturing=0.4),
+        lockdown_policy.LockdownPolicy(construction=0.5),
+    ]
+    outputs = model.get_sector_outputs(policies)
+    assert outputs.shape == (3, len(model.sectors))
+    np.testing.assert_allclose(outputs[0], model.baseline)
+
+    manufacturing = model.sectors.index('Manufacturing')
+    construction = model.sectors.index('Construction')
+    assert outputs[1, manufacturing] == pytest.approx(
+        0.3 * model.baseline[manufacturing])
+    assert outputs[2, construction] == pytest.approx(
+        0.5 * model.baseline[construction])
+
+    single = model._get_economic_vector_for_single_policy(policies[1])  # pylint: disable=protected-access
+    assert list(single) == model.sectors
+    np.testing.assert_allclose(list(single.values()), outputs[1])
+
+
+def test_daily_economic_output():
+    """
+    test that daily outputs follow the policies and accumulate over time
+    """
+    model = EconomicLockdownModel()
+    closed = lockdown_policy.LockdownPolicy(construction=0.5)
+    open_policy = lockdown_policy.LockdownPolicy()
+    policy_timeseries = lockdown_policy.LockdownTimeSeries(
+        policies=[
+            lockdown_policy.LockdownPolicyApplication(
+                closed, start=datetime.date(2020, 1, 1), end=datetime.date(2020, 1, 4)),
+            lockdown_policy.LockdownPolicyApplication(
+                open_policy, start=datetime.date(2020, 1, 4), end=datetime.date(2020, 1, 6)),
+        ])
+    output = model.get_economic_output(policy_timeseries)
+    assert output.daily.shape == (5, len(model.sectors))
+    assert output.daily.index[0] == datetime.datetime(2020, 1, 1)
+
+    construction = model.baseline[model.sectors.index('Construction')] / 365 / 4
+    np.testing.assert_allclose(
+        output.daily['Construction'], [0.5 * construction] * 3 + [construction] * 2)
+    assert output.totals['Construction'] == pytest.approx(3.5 * construction)
+    assert model.get_economic_vector(policy_timeseries) == pytest.approx(output.totals)
+
+    # Days are dated by their own application, skipping gaps between them
+    gapped = lockdown_policy.LockdownTimeSeries(
+        policies=[policy_timeseries.policies[0],
+                  lockdown_policy.LockdownPolicyApplication(
+                      open_policy, start=datetime.date(2020, 1, 10),
+                      end=datetime.date(2020, 1, 12))])
+    gapped_output = model.get_economic_output(gapped)
+    assert list(gapped_output.daily.index.day) == [1, 2, 3, 10, 11]
+    np.testing.assert_allclose(gapped_output.daily, output.daily)
+
+    # Batches evaluate many time series of the same length at once
+    open_timeseries = lockdown_policy.LockdownTimeSeries(
+        policies=[lockdown_policy.LockdownPolicyApplication(
+            open_policy, start=datetime.date(2020, 2, 1), end=datetime.date(2020, 2, 6))])
+    batch = model.get_daily_outputs([policy_timeseries, open_timeseries])
+    assert batch.shape == (2, 5, len(model.sectors))
+    np.testing.assert_allclose(batch[0], output.daily.to_numpy())
+    np.testing.assert_allclose(batch[1], np.tile(model.baseline / 365 / 4, (5, 1)))
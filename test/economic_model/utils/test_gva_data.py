@@ -0,0 +1,35 @@
+"""
+Test the gva data loader
+"""
+import pytest
+from help_project.src.economic_model.utils import gva_data
+
+
+def test_gva_data_is_read_once(monkeypatch):
+    """
+    test that the csv files are only read once per process
+    """
+    gva_data.load_gva_data.cache_clear()
+    reads = []
+    read_csv = gva_data.pd.read_csv
+    monkeypatch.setattr(gva_data.pd, 'read_csv',
+                        lambda *args, **kwargs: reads.append(args) or read_csv(*args, **kwargs))
+
+    gva_data.preload()
+    first = gva_data.BaseGVA()
+    second = gva_data.BaseGVA()
+    assert len(reads) == 2
+    assert first.get_gvas() is second.get_gvas()
+    gva_data.load_gva_data.cache_clear()
+
+
+def test_gva_data_is_immutable():
+    """
+    test that callers can't modify the shared data
+    """
+    gva = gva_data.BaseGVA()
+    with pytest.raises(TypeError):
+        gva.get_gvas()['Construction'] = 0
+    sector_mapping = gva.get_sector_mapping()
+    sector_mapping['sector'] = None
+    assert gva.get_sector_mapping()['sector'].notna().any()
@@ -2,6 +2,8 @@
 import datetime
 import pytest
 import attr
+import numpy as np
+import pandas as pd
 from help_project.src.exitstrategies import lockdown_policy
 
 
@@ -218,3 +220,81 @@ def test_lockdown_policy_slicing_to_end():
             end=datetime.date(2020, 1, 20),
         ),
     ]
+
+
+def test_lockdown_policy_array_round_trip():
+    """Test the conversion of policies to and from arrays."""
+    policy = lockdown_policy.LockdownPolicy(agriculture=0.5, covid_testing=1)
+    array = policy.to_array()
+    assert array.shape == (len(lockdown_policy.POLICY_FIELDS),)
+    assert array[lockdown_policy.POLICY_FIELDS.index('agriculture')] == 0.5
+    assert policy.to_array() is array
+    with pytest.raises(ValueError):
+        array[0] = 0
+
+    rebuilt = lockdown_policy.LockdownPolicy.from_array(array)
+    assert rebuilt == policy
+    assert hash(rebuilt) == hash(policy)
+    with pytest.raises(ValueError):
+        lockdown_policy.LockdownPolicy.from_array(array[:-1])
+
+
+def test_policy_matrix():
+    """Test that the policy matrix stacks policies as rows."""
+    policies = [
+        lockdown_policy.LockdownPolicy(),
+        lockdown_policy.LockdownPolicy(curfew=0.2),
+    ]
+    matrix = lockdown_policy.PolicyMatrix.from_policies(policies)
+    assert len(matrix) == 2
+    assert matrix.array.flags.c_contiguous
+    np.testing.assert_array_equal(matrix.column('curfew'), [1.0, 0.2])
+    assert list(matrix) == policies
+    assert matrix[1] == policies[1]
+    assert len(matrix[1:]) == 1
+
+
+def test_lockdown_policy_indices_for_dates():
+    """Test that dates map to the application in force at the time."""
+    policies = [
+        lockdown_policy.LockdownPolicyApplication(
+            policy=lockdown_policy.LockdownPolicy(curfew=i / 10),
+            start=datetime.date(2020, 1, 1 + 10 * i),
+            end=datetime.date(2020, 1, 11 + 10 * i) if i < 2 else None)
+        for i in range(3)
+    ]
+    timeseries = lockdown_policy.LockdownTimeSeries(policies=policies)
+    dates = pd.date_range('2019-12-31', periods=40)
+    expected = [-1] + [0] * 10 + [1] * 10 + [2] * 19
+    np.testing.assert_array_equal(timeseries.policy_indices_for(dates), expected)
+    assert timeseries.policy_index(datetime.date(2020, 1, 15)) == 1
+    assert timeseries.policy_index(25) == 2
+    assert timeseries[pd.Timestamp('2020-01-15')] == policies[1].policy
+
+    # Unsorted applications resolve to the first one, as a scan would
+    overlapping = lockdown_policy.LockdownTimeSeries(
+        policies=[policies[1], policies[0], policies[2]])
+    assert not overlapping.intervals()[2]
+    np.testing.assert_array_equal(
+        overlapping.policy_indices_for(dates)[[0, 5, 15, 25]], [-1, 1, 0, 2])
+
+
+def test_lockdown_policy_timeseries_dates():
+    """Test that each application's days start at its own start date."""
+    timeseries = lockdown_policy.LockdownTimeSeries(policies=[
+        lockdown_policy.LockdownPolicyApplication(
+            policy=lockdown_policy.LockdownPolicy(),
+            start=datetime.date(2020, 1, 1),
+            end=datetime.date(2020, 1, 3)),
+        lockdown_policy.LockdownPolicyApplication(
+            policy=lockdown_policy.LockdownPolicy(curfew=0.5),
+            start=datetime.date(2020, 2, 1),
+            end=None),
+    ])
+    dates = timeseries.dates()
+    assert len(dates) == len(timeseries) == 2 + 365
+    np.testing.assert_array_equal(
+        dates[:4], pd.to_datetime(['2020-01-01', '2020-01-02',
+                                   '2020-02-01', '2020-02-02']))
+    assert dates[-1] == pd.Timestamp('2021-01-30')
+    assert len(lockdown_policy.LockdownTimeSeries(policies=[]).dates()) == 0
@@ -0,0 +1,66 @@
+"""Test the analysis module."""
+import numpy as np
+import pytest
+
+from help_project.src.optimization import analysis
+from help_project.src.optimization import loss_function
+
+
+def peel_ranks(values):
+    """Compute the ranks by removing one frontier at a time."""
+    ranks = np.full(len(values), -1)
+    rank = 0
+    while (ranks < 0).any():
+        remaining = np.flatnonzero(ranks < 0)
+        mask = loss_function.nondominated_mask(values[remaining])
+        ranks[remaining[mask]] = rank
+        rank += 1
+    return ranks
+
+
+@pytest.mark.parametrize('objectives', [2, 3])
+def test_nondominated_sort(objectives):
+    """Test the ranks against peeling frontiers off one by one."""
+    values = np.random.RandomState(0).randint(0, 6, size=(200, objectives))
+    np.testing.assert_array_equal(
+        analysis.nondominated_sort(values), peel_ranks(values))
+
+
+def test_fronts():
+    """Test that records are grouped by rank."""
+    records = [('a', (1, 3)), ('b', (2, 4)), ('c', (3, 1)), ('d', (3, 1))]
+    assert analysis.fronts(records) == [
+        [('a', (1, 3)), ('c', (3, 1)), ('d', (3, 1))],
+        [('b', (2, 4))],
+    ]
+
+
+def test_hypervolume():
+    """Test the hypervolume on simple cases."""
+    assert analysis.hypervolume([(1, 3), (2, 2), (3, 1)], (4, 4)) == 6
+    # Dominated points and points beyond the reference don't add volume
+    assert analysis.hypervolume(
+        [(1, 3), (2, 2), (3, 1), (3, 3), (0, 5)], (4, 4)) == 6
+    assert analysis.hypervolume([(0, 1, 1), (1, 0, 1)], (2, 2, 2)) == 3
+    assert analysis.hypervolume([5, 3, 4], [6]) == 3
+
+
+def test_hypervolume_matches_sampling():
+    """Test the hypervolume in three dimensions against sampling."""
+    rng = np.random.RandomState(1)
+    values = rng.rand(20, 3)
+    samples = rng.rand(100000, 3)
+    dominated = np.zeros(len(samples), dtype=bool)
+    for row in values:
+        dominated |= np.all(samples >= row, axis=1)
+    assert analysis.hypervolume(values, (1, 1, 1)) == pytest.approx(
+        dominated.mean(), abs=0.01)
+
+
+def test_hypervolume_trace():
+    """Test that the trace grows up to the hypervolume of all records."""
+    values = np.random.RandomState(2).rand(50, 2)
+    records = list(enumerate(values))
+    trace = analysis.hypervolume_trace(records, (1, 1))
+    assert (np.diff(trace) >= 0).all()
+    assert trace[-1] == pytest.approx(analysis.hypervolume(values, (1, 1)))
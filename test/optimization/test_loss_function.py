@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from help_project.src.optimization import loss_function
 
 
@@ -47,3 +50,101 @@ def test_pareto_multi_objective_accumulate():
     pareto.update('b', [5, 4])
     assert pareto.frontier == [('a', [4, 5]),
                                ('b', [5, 4])]
+
+
+def reference_frontier(points, losses):
+    """Compute the frontier with the list based update, one point at a time."""
+    frontier = []
+    for point, loss in zip(points, losses):
+        if any(p == point or loss_function.ParetoFrontier.dominate(other, loss)
+               for p, other in frontier):
+            continue
+        frontier = [(p, other) for p, other in frontier
+                    if not loss_function.ParetoFrontier.dominate(loss, other)]
+        frontier.append((point, loss))
+    return frontier
+
+
+@pytest.mark.parametrize('objectives', [1, 2, 3])
+def test_pareto_matches_reference(objectives):
+    """Test the array backed updates against the list based one."""
+    rng = np.random.RandomState(objectives)
+    # Few distinct values, so that there are plenty of ties
+    losses = [tuple(row) for row in rng.randint(0, 8, size=(300, objectives))]
+    points = [i % 250 for i in range(300)]
+    expected = reference_frontier(points, losses)
+
+    pareto = loss_function.ParetoFrontier()
+    for point, loss in zip(points, losses):
+        pareto.update(point, loss)
+    assert pareto.frontier == expected
+
+    pareto = loss_function.ParetoFrontier()
+    pareto.update_many(points[:100], losses[:100])
+    pareto.update_many(points[100:], losses[100:])
+    assert pareto.frontier == expected
+
+
+def test_pareto_unhashable_points():
+    """Test that unhashable points are deduplicated too."""
+    pareto = loss_function.ParetoFrontier()
+    pareto.update({'a': 1}, [4, 5])
+    pareto.update({'a': 1}, [3, 3])
+    pareto.update_many([{'a': 2}, {'a': 2}], [[5, 4], [6, 3]])
+    assert pareto.frontier == [({'a': 1}, [4, 5]), ({'a': 2}, [5, 4])]
+
+
+@pytest.mark.parametrize('objectives', [2, 3])
+def test_pareto_update_many_dict_points(objectives):
+    """Test batched updates with dict points against the list based one."""
+    rng = np.random.RandomState(objectives)
+    losses = [tuple(row) for row in rng.randint(0, 8, size=(300, objectives))]
+    points = [{'a': i % 250, 'b': [i % 2]} for i in range(300)]
+    expected = reference_frontier(points, losses)
+
+    pareto = loss_function.ParetoFrontier()
+    pareto.update_many(points[:100], losses[:100])
+    pareto.update_many(points[100:], losses[100:])
+    assert pareto.frontier == expected
+    assert pareto.contains(dict(reversed(list(expected[0][0].items()))))
+
+
+def test_point_key():
+    """Test that equal points get the same hashable key."""
+    assert loss_function.point_key(3) == 3
+    assert (loss_function.point_key({'a': [1, {'b': 2}], 'c': 3}) ==
+            loss_function.point_key({'c': 3, 'a': [1, {'b': 2}]}))
+    assert (loss_function.point_key({'a': 1}) !=
+            loss_function.point_key({'a': 2}))
+    hash(loss_function.point_key({1: 'x', 'a': 'y'}))
+
+
+@pytest.mark.parametrize('objectives', [2, 3])
+def test_pareto_update_many_repeated_point(objectives):
+    """Test that a repeated point keeps the loss that is not dominated."""
+    pareto = loss_function.ParetoFrontier()
+    pareto.update('a', [2] * objectives)
+    pareto.update_many(['b', 'c', 'b'], [[3] * objectives,
+                                         [1] + [3] * (objectives - 1),
+                                         [1] * objectives])
+    assert pareto.frontier == [('b', [1] * objectives)]
+
+    pareto = loss_function.ParetoFrontier()
+    pareto.update_many(['b', 'a', 'b'], [[3] * objectives,
+                                         [2] * objectives,
+                                         [1] + [3] * (objectives - 1)])
+    expected = reference_frontier(
+        ['b', 'a', 'b'], [[3] * objectives, [2] * objectives,
+                          [1] + [3] * (objectives - 1)])
+    assert pareto.frontier == expected
+
+
+def test_nondominated_mask():
+    """Test that the mask keeps ties and drops dominated losses."""
+    values = np.array([[1, 3], [2, 2], [2, 2], [3, 3], [1, 4]])
+    np.testing.assert_array_equal(
+        loss_function.nondominated_mask(values),
+        [True, True, True, False, False])
+    np.testing.assert_array_equal(
+        loss_function.nondominated_mask(np.c_[values, [0, 0, 0, 0, -1]]),
+        [True, True, True, False, True])
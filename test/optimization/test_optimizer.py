@@ -1,3 +1,7 @@
+import numpy as np
+import pytest
+
+from help_project.src.optimization import analysis
 from help_project.src.optimization import lockdown_config
 from help_project.src.optimization import loss_function
 from help_project.src.optimization import optimizer
@@ -91,3 +95,244 @@ def test_optimize_multi_objective_exhaustive_search():
     assert solution == [({'strategy': 1}, (1, 5)),
                         ({'strategy': 2}, (2, 2)),
                         ({'strategy': 3}, (5, 1))]
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_optimize_concurrent_exhaustive_search(executor):
+    """Test that concurrent evaluation finds the same frontier."""
+    opt = optimizer.ExhaustiveSearch(
+        config=lockdown_config.LockdownConfig(
+            strategy=lockdown_config.Options([1, 2, 3]),
+        ),
+        loss=MultiLoss(),
+        evaluation=optimizer.EvaluationConfig(executor=executor, workers=2),
+    )
+    solution = opt.optimize(
+        health_model=MockHealthModel(),
+        economic_model=MockEconomicModel(),
+    )
+    assert solution == [({'strategy': 1}, (1, 5)),
+                        ({'strategy': 2}, (2, 2)),
+                        ({'strategy': 3}, (5, 1))]
+    # Ordered results are recorded in the order they were proposed
+    assert opt.records == [({'strategy': 1}, (1, 5)),
+                           ({'strategy': 2}, (2, 2)),
+                           ({'strategy': 3}, (5, 1))]
+
+
+def test_optimize_concurrent_unordered():
+    """Test that unordered concurrent evaluation respects the step count."""
+    opt = optimizer.ExhaustiveSearch(
+        config=lockdown_config.LockdownConfig(
+            strategy=lockdown_config.Options([1, 2, 3]),
+        ),
+        loss=WeightedLoss(1, 1),
+        evaluation=optimizer.EvaluationConfig(
+            executor='thread', batch_size=3, ordered=False),
+    )
+    solution = opt.optimize(
+        health_model=MockHealthModel(),
+        economic_model=MockEconomicModel(),
+        n_steps=2,
+    )
+    assert len(opt.records) == 2
+    assert solution == [({'strategy': 2}, 4)]
+
+
+def test_evaluation_config():
+    """Test the defaults and validation of the evaluation config."""
+    evaluation = optimizer.EvaluationConfig(executor='thread')
+    assert evaluation.workers >= 1
+    assert evaluation.batch_size is None
+    with pytest.raises(ValueError):
+        optimizer.EvaluationConfig(executor='fiber')
+
+
+class TradeoffHealthModel():  # pylint: disable=too-few-public-methods
+    """Mock health model, better the more closed the policy is."""
+    def run(self, policy):
+        return sum((1 - value) ** 2 * (int(name[1:]) + 1)
+                   for name, value in policy.items() if name[0] == 'x')
+
+
+class TradeoffEconomicModel():  # pylint: disable=too-few-public-methods
+    """Mock economic model, better the more open the policy is."""
+    def get_economic_vector(self, policy):
+        return sum(value * (8 - int(name[1:]))
+                   for name, value in policy.items() if name[0] == 'x')
+
+
+def test_optimize_evolutionary_search():
+    """Test that evolutionary search gets close to the exhaustive frontier."""
+    config = lockdown_config.LockdownConfig(
+        fixed=1,
+        **{'x%d' % i: lockdown_config.Options([0, 0.5, 1]) for i in range(8)})
+    exhaustive = optimizer.ExhaustiveSearch(config=config, loss=MultiLoss())
+    exhaustive_frontier = exhaustive.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+    reference = np.max([loss for _, loss in exhaustive.records], axis=0)
+
+    opt = optimizer.EvolutionarySearch(
+        config=config, loss=MultiLoss(),
+        evolution=optimizer.EvolutionConfig(
+            population_size=40, generations=15, seed=0))
+    solution = opt.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+
+    assert len(exhaustive.records) == 3 ** 8
+    assert len(opt.records) <= 40 * 15
+    assert all(policy['fixed'] == 1 for policy, _ in opt.records)
+    # No policy is evaluated twice
+    assert len({tuple(sorted(policy.items())) for policy, _ in opt.records}
+               ) == len(opt.records)
+    assert analysis.hypervolume(
+        [loss for _, loss in solution], reference) > 0.95 * analysis.hypervolume(
+            [loss for _, loss in exhaustive_frontier], reference)
+
+
+def test_optimize_evolutionary_search_small_space():
+    """Test that the search stops once all the options were tried."""
+    opt = optimizer.EvolutionarySearch(
+        config=lockdown_config.LockdownConfig(
+            strategy=lockdown_config.Options([1, 2, 3]),
+        ),
+        loss=MultiLoss(),
+        evolution=optimizer.EvolutionConfig(seed=0))
+    solution = opt.optimize(
+        health_model=MockHealthModel(),
+        economic_model=MockEconomicModel(),
+    )
+    assert len(opt.records) == 3
+    assert sorted(solution, key=lambda item: item[1]) == [
+        ({'strategy': 1}, (1, 5)),
+        ({'strategy': 2}, (2, 2)),
+        ({'strategy': 3}, (5, 1))]
+
+
+def test_optimize_evolutionary_search_concurrently():
+    """Test that generations are evaluated as whole batches on a pool."""
+    opt = optimizer.EvolutionarySearch(
+        config=lockdown_config.LockdownConfig(
+            x=lockdown_config.Range(0, 1),
+            y=lockdown_config.Range(0, 1),
+        ),
+        loss=MultiLoss(),
+        evolution=optimizer.EvolutionConfig(
+            population_size=10, generations=3, seed=0),
+        evaluation=optimizer.EvaluationConfig(executor='thread', workers=4))
+    opt.optimize(
+        health_model=type('Health', (), {
+            'run': lambda self, policy: policy['x'] + policy['y']})(),
+        economic_model=type('Economic', (), {
+            'get_economic_vector': lambda self, policy: 2 - policy['x']})(),
+    )
+    assert len(opt.records) == 30
+    assert opt.generation == 3
+    assert not opt.brood.in_flight
+    assert all(0 <= policy['x'] <= 1 and 0 <= policy['y'] <= 1
+               for policy, _ in opt.records)
+
+
+def test_optimize_surrogate_search():
+    """Test that screening with a surrogate finds a good frontier cheaply."""
+    config = lockdown_config.LockdownConfig(
+        **{'x%d' % i: lockdown_config.Options([0, 0.5, 1]) for i in range(8)})
+    exhaustive = optimizer.ExhaustiveSearch(config=config, loss=MultiLoss())
+    exhaustive_frontier = exhaustive.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+    reference = np.max([loss for _, loss in exhaustive.records], axis=0)
+
+    opt = optimizer.SurrogateSearch(
+        config=config, loss=MultiLoss(),
+        evolution=optimizer.EvolutionConfig(
+            population_size=20, generations=8, seed=0))
+    solution = opt.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+
+    assert len(opt.records) == 20 * 8
+    # The first generation is random, the others are screened
+    assert len(opt.surrogate_errors) == 7
+    assert opt.surrogate_error.shape == (2,)
+    assert analysis.hypervolume(
+        [loss for _, loss in solution], reference) > 0.95 * analysis.hypervolume(
+            [loss for _, loss in exhaustive_frontier], reference)
+
+
+def test_optimize_surrogate_search_small_population():
+    """Test that screening works with fewer points than KNN neighbors."""
+    opt = optimizer.SurrogateSearch(
+        config=lockdown_config.LockdownConfig(
+            **{'x%d' % i: lockdown_config.Options([0, 0.5, 1])
+               for i in range(4)}),
+        loss=MultiLoss(),
+        evolution=optimizer.EvolutionConfig(
+            population_size=4, generations=3, seed=0))
+    opt.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+
+    assert len(opt.records) == 4 * 3
+    assert len(opt.surrogate_errors) == 2
+    assert opt.regressor.n_neighbors == 5
+
+
+def test_exhaustive_search_streaming(tmp_path):
+    """Test that streaming records match the list of records."""
+    config = lockdown_config.LockdownConfig(
+        fixed=1,
+        y=lockdown_config.Range(0, 1),
+        **{'x%d' % i: lockdown_config.Options([0, 0.5, 1]) for i in range(8)})
+    exhaustive = optimizer.ExhaustiveSearch(config=config, loss=MultiLoss())
+    exhaustive.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+
+    streaming = optimizer.ExhaustiveSearch(
+        config=config, loss=MultiLoss(),
+        records_path=str(tmp_path / 'records'))
+    streaming.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+
+    assert not streaming.records
+    assert streaming.arrays.losses.shape == (3 ** 8, 2)
+    assert (tmp_path / 'records.losses.npy').exists()
+    records = list(streaming.iter_records())
+    assert len(records) == 3 ** 8
+    # Same grid order, and the range arguments are kept along the losses
+    for (policy, loss), (expected_policy, expected_loss) in zip(
+            records, exhaustive.records):
+        assert 0 <= policy.pop('y') <= 1
+        expected_policy.pop('y')
+        assert policy == expected_policy
+        assert loss == pytest.approx(expected_loss)
+    assert streaming.encode(records[100][0]) == 100
+
+
+def test_exhaustive_search_shards():
+    """Test that shards split the grid and merge into the same frontier."""
+    config = lockdown_config.LockdownConfig(
+        **{'x%d' % i: lockdown_config.Options([0, 0.5, 1]) for i in range(6)})
+    exhaustive = optimizer.ExhaustiveSearch(config=config, loss=MultiLoss())
+    expected = exhaustive.optimize(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel())
+
+    shards = [optimizer.ExhaustiveSearch(
+        config=config, loss=MultiLoss(), streaming=True, shard=(i, 4))
+              for i in range(4)]
+    assert [(shard.start, shard.stop) for shard in shards] == [
+        (0, 182), (182, 364), (364, 546), (546, 729)]
+    assert sum(len(list(shard.generate_proposals())) for shard in shards) == 729
+    # Nothing is recorded yet
+    assert not list(shards[0].iter_records())
+
+    solution = exhaustive.optimize_sharded(
+        health_model=TradeoffHealthModel(),
+        economic_model=TradeoffEconomicModel(),
+        shards=4, workers=2)
+    assert solution == expected